@@ -48,6 +48,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'consultants.middleware.SlowRequestProfilerMiddleware',
 ]
 
 ROOT_URLCONF = 'backend.urls'
@@ -74,6 +75,52 @@ AUTH_USER_MODEL = 'consultants.User'
 MEDIA_URL = '/media/'
 MEDIA_ROOT = BASE_DIR / 'media'
 
+# Limites du cache des extractions de CV (éviction LRU) : nombre d'entrées et
+# volume des textes en octets, vérifiées toutes les CV_CACHE_EVICT_EVERY écritures
+CV_CACHE_MAX_ENTRIES = 10000
+CV_CACHE_MAX_BYTES = 500 * 1024 * 1024
+CV_CACHE_EVICT_EVERY = 100
+
+# Pages de CV passées à Tesseract en parallèle pour un même document
+CV_OCR_WORKERS = 4
+
+# Modèles Tesseract installés, par ordre de priorité ; la langue de chaque CV
+# est détectée et seuls les modèles utiles sont chargés (voir consultants.ocr)
+CV_OCR_LANGUAGES = ['fra', 'ara', 'eng']
+# Durée maximale de l'OCR d'une page (secondes), la page est ignorée au-delà
+CV_OCR_PAGE_TIMEOUT = 60
+# Threads OpenMP par processus Tesseract (OMP_THREAD_LIMIT) : le parallélisme
+# vient déjà des pages, processus workers x CV_OCR_WORKERS x ce nombre <= cœurs
+CV_OCR_THREADS = 1
+
+# Limites des CV envoyés à l'inscription
+CV_UPLOAD_MAX_SIZE = 20 * 1024 * 1024
+CV_MAX_PAGES = 50
+# Processus de validation des PDF pour l'inscription asynchrone (ASGI, consultants.async_views)
+CV_VALIDATION_WORKERS = 2
+
+# Modèle spaCy, chargé au premier CV traité (voir consultants.nlp)
+CV_NLP_MODEL = 'en_core_web_sm'
+
+# Profils cProfile des requêtes et jobs CV plus lents que ce seuil (None = désactivé)
+CV_PROFILE_THRESHOLD_MS = None
+CV_PROFILE_DIR = BASE_DIR / 'profiles'
+
+# Matrice consultants x compétences du classement des appels d'offres (consultants.matching)
+MATCHING_MATRIX_PATH = BASE_DIR / 'matching' / 'consultants.npz'
+
+# Durées par étape du traitement des CV (consultants.metrics)
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'handlers': {
+        'console': {'class': 'logging.StreamHandler'},
+    },
+    'loggers': {
+        'consultants': {'handlers': ['console'], 'level': 'INFO'},
+    },
+}
+
 
 # Database Configuration (Correction)
 # https://docs.djangoproject.com/en/4.2/ref/settings/#databases
@@ -88,6 +135,18 @@ DATABASES = {
     }
 }
 
+# Cache partagé par les processus web et les workers CV (l'invalidation faite
+# par un worker doit être vue par le serveur web) ; Redis ou Memcached en production
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': BASE_DIR / 'cache',
+    }
+}
+
+# Durée de vie (secondes) des fiches consultant en cache, invalidées à chaque modification
+CONSULTANT_CACHE_TIMEOUT = 15 * 60
+
 
 
 # Password validation
@@ -0,0 +1,170 @@
+import asyncio
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import IntegrityError, transaction
+from django.http import JsonResponse
+from django.utils.cache import get_conditional_response
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from .consultant_cache import aconsultant_version, aget_consultant_data
+from .extraction import check_cv_pdf, check_cv_size
+from .jobs import enqueue_cv_job
+from .metrics import span
+from .models import Competence, CVJob, User
+from .serializers import CompetenceSerializer, ConsultantSerializer
+from .views import consultant_validators, cv_job_payload, set_validators
+
+# Vues Django asynchrones (DRF n'a pas de vues async) : servies sous ASGI
+# (backend.asgi), elles ne mobilisent un thread que pour les appels synchrones.
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def cpu_executor():
+    """Processus de validation des PDF (fitz garde le GIL), créés au premier appel"""
+    global _executor
+    if _executor is None:
+        _executor = ProcessPoolExecutor(
+            max_workers=settings.CV_VALIDATION_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+    return _executor
+
+
+def json_response(data, status=200):
+    return JsonResponse(data, status=status, encoder=DjangoJSONEncoder, safe=False)
+
+
+def create_consultant(post, files, email, nom, password):
+    """Écritures de l'inscription en une transaction : (consultant, job, erreurs)
+
+    L'ORM asynchrone n'ouvre pas de transaction : ce bloc est exécuté dans
+    un thread (sync_to_async), le mot de passe arrive déjà haché.
+    """
+    with transaction.atomic():
+        user = User.objects.create(
+            username=User.normalize_username(email), email=User.objects.normalize_email(email),
+            password=password, nom=nom, role='CONSULTANT',
+        )
+        data = post.copy()
+        data['user'] = user.id
+        for name, uploaded in files.items():
+            data[name] = uploaded
+        serializer = ConsultantSerializer(data=data)
+        if not serializer.is_valid():
+            transaction.set_rollback(True)
+            return None, None, serializer.errors
+
+        consultant = serializer.save()
+        job = enqueue_cv_job(consultant, consultant.cv.name) if consultant.cv else None
+        return consultant, job, None
+
+
+@csrf_exempt
+@require_POST
+async def consultant_register(request):
+    """Inscription asynchrone, mêmes champs et réponses que views.consultant_register
+
+    Le serveur ASGI reçoit le corps sans bloquer de thread (fichier temporaire
+    au-delà de FILE_UPLOAD_MAX_MEMORY_SIZE) ; la validation du PDF part dans
+    un processus, le hachage et la transaction dans des threads. L'extraction
+    reste confiée au worker (python manage.py cv_worker).
+    """
+    # Découpage multipart du corps déjà reçu : lecture de fichier, hors de la boucle
+    post, files = await sync_to_async(lambda: (request.POST, request.FILES))()
+    email = post.get('email')
+    nom = post.get('nom') or 'Consultant'
+    password = post.get('password') or 'consultant123'
+    if not email:
+        return json_response({"error": "Email requis."}, status=400)
+    if await User.objects.filter(username=email).aexists():
+        return json_response({"error": "Un utilisateur avec cet email existe déjà."}, status=400)
+
+    cv_file = files.get('cv')
+    if cv_file:
+        try:
+            with span("validation_cv", octets=cv_file.size, mode="async"):
+                check_cv_size(cv_file.size)
+                # Gros fichiers déjà sur disque : seul le chemin passe au processus
+                if hasattr(cv_file, "temporary_file_path"):
+                    source = cv_file.temporary_file_path()
+                else:
+                    source = await sync_to_async(cv_file.read)()
+                    cv_file.seek(0)
+                await asyncio.get_running_loop().run_in_executor(cpu_executor(), check_cv_pdf, source)
+        except ValueError as e:
+            return json_response({"error": str(e)}, status=400)
+
+    try:
+        # PBKDF2 libère le GIL : un thread hors du contexte de la requête suffit
+        hashed = await sync_to_async(make_password, thread_sensitive=False)(password)
+        consultant, job, errors = await sync_to_async(create_consultant)(post, files, email, nom, hashed)
+    except IntegrityError:
+        return json_response({"error": "Un utilisateur avec cet email existe déjà."}, status=400)
+    except Exception as e:
+        logger.exception("Erreur inscription consultant")
+        return json_response({"error": str(e)}, status=500)
+
+    if errors:
+        return json_response(errors, status=400)
+    return json_response({
+        "message": "Consultant créé avec succès.",
+        "consultant_id": consultant.id,
+        "job_id": job.id if job else None,
+    }, status=202 if job else 201)
+
+
+async def aconditional(request, kind, version, build):
+    """views.conditional pour une construction asynchrone"""
+    etag, last_modified = consultant_validators(kind, version)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = await build()
+    return set_validators(response, etag, last_modified)
+
+
+@require_GET
+async def consultant_data(request, consultant_id):
+    version = await aconsultant_version(consultant_id)
+    if version is None:
+        return json_response({"error": "Consultant introuvable."}, status=404)
+
+    async def build():
+        data = await aget_consultant_data(consultant_id, version)
+        if data is None:
+            return json_response({"error": "Consultant introuvable."}, status=404)
+        return json_response(data)
+
+    return await aconditional(request, "data", version, build)
+
+
+@require_GET
+async def consultant_competences(request, consultant_id):
+    version = await aconsultant_version(consultant_id)
+    if version is None:
+        return json_response({"error": "Consultant introuvable."}, status=404)
+
+    async def build():
+        competences = [
+            c async for c in Competence.objects.filter(consultant_id=consultant_id).select_related('skill')
+        ]
+        return json_response(CompetenceSerializer(competences, many=True).data)
+
+    return await aconditional(request, "competences", version, build)
+
+
+@require_GET
+async def cv_job_status(request, job_id):
+    job = await CVJob.objects.filter(id=job_id).afirst()
+    if job is None:
+        return json_response({"error": "Job introuvable."}, status=404)
+    return json_response(cv_job_payload(job))
@@ -0,0 +1,360 @@
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import time
+from contextlib import contextmanager
+from datetime import date, datetime, timedelta, timezone
+from django.db import transaction
+from . import nlp
+from .bulk import bulk_add_competences, bulk_upsert_consultants
+from .extraction import clean_text, detect_profile, open_pdf, page_needs_ocr, render_page
+from .models import AppelOffre, Consultant, Mission, ParticipationMission, User
+from .ocr import ocr_image
+from .staffing import bookings, consultant_conflicts, free_consultants
+from .taxonomy import get_taxonomy, taxonomy_path
+
+KINDS = ["texte", "scan", "multipage", "mixte"]
+LANGUES = ["fr", "en", "ar", "fr+ar", "en+fr"]
+
+PRENOMS = ["Mohamed", "Mariem", "Fatimetou", "Abdallah", "Aichetou", "Ahmed", "Amina", "Brahim", "Salma", "Jean"]
+NOMS = ["Salem", "Ould Cheikh", "Mint Ahmed", "Diallo", "Ba", "Sy", "Kane", "Vall", "Martin", "Dupont"]
+
+PHRASES = {
+    "fr": [
+        "Expérience de {annees} ans en {competence} et {competence2}.",
+        "Consultant senior basé à {ville}, missions pour des bailleurs internationaux.",
+        "Responsable de la mise en place de {competence} pour un projet national.",
+        "Formation : Master en informatique, Université de {ville}.",
+    ],
+    "en": [
+        "{annees} years of experience with {competence} and {competence2}.",
+        "Senior consultant based in {ville}, working with international donors.",
+        "Led the rollout of {competence} for a nationwide programme.",
+        "Education: MSc in Computer Science, University of {ville}.",
+    ],
+    "ar": [
+        "خبرة {annees} سنوات في {competence}.",
+        "مستشار مقيم في {ville_ar}.",
+        "مسؤول عن تنفيذ مشروع وطني.",
+    ],
+}
+
+
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def cv_html(rng, langue, taxonomy_data):
+    competences = list(taxonomy_data["competences"])
+    localites = taxonomy_data["localites"]
+    ville = rng.choice(list(localites))
+    ville_ar = next((a for a in localites[ville].get("alias", []) if not a.isascii()), ville)
+    prenom, nom = rng.choice(PRENOMS), rng.choice(NOMS)
+    email = f"{prenom}.{nom}".lower().replace(" ", "") + f"{rng.randint(1, 999)}@example.com"
+
+    lignes = [
+        f"<h2>Nom : {nom} {prenom}</h2>",
+        f"<p>{email} - +222 {rng.randint(20, 49)} {rng.randint(10, 99)} {rng.randint(10, 99)} {rng.randint(10, 99)}</p>",
+    ]
+    for code in langue.split("+"):
+        for _ in range(rng.randint(3, 8)):
+            phrase = rng.choice(PHRASES[code]).format(
+                annees=rng.randint(2, 20), competence=rng.choice(competences),
+                competence2=rng.choice(competences), ville=ville, ville_ar=ville_ar,
+            )
+            attrs = " dir='rtl'" if code == "ar" else ""
+            lignes.append(f"<p{attrs}>{phrase}</p>")
+    return "\n".join(lignes)
+
+
+def add_text_page(doc, html):
+    import fitz
+
+    page = doc.new_page()
+    page.insert_htmlbox(fitz.Rect(50, 50, page.rect.width - 50, page.rect.height - 50), html)
+    return page
+
+
+def add_scanned_page(doc, html, dpi=150):
+    """Page image uniquement : le texte est rendu puis réinséré comme bitmap"""
+    import fitz
+
+    source = fitz.open()
+    pix = add_text_page(source, html).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+    page = doc.new_page()
+    page.insert_image(page.rect, pixmap=pix)
+    source.close()
+
+
+def generate_corpus(dest, count, seed=42):
+    """Génère count CV dans dest ; même graine, même corpus. Retourne la description des fichiers"""
+    import fitz
+
+    with open(taxonomy_path(), encoding="utf-8") as f:
+        taxonomy_data = json.load(f)
+
+    os.makedirs(dest, exist_ok=True)
+    rng = random.Random(seed)
+    corpus = []
+    for i in range(count):
+        kind = KINDS[i % len(KINDS)]
+        langue = rng.choice(LANGUES)
+        nb_pages = rng.randint(3, 6) if kind in ("multipage", "mixte") else 1
+
+        doc = fitz.open()
+        for page_number in range(nb_pages):
+            html = cv_html(rng, langue, taxonomy_data)
+            scanned = kind == "scan" or (kind == "mixte" and page_number % 2 == 1)
+            if scanned:
+                add_scanned_page(doc, html)
+            else:
+                add_text_page(doc, html)
+
+        name = f"cv_{i:05d}_{kind}_{langue.replace('+', '-')}.pdf"
+        doc.set_metadata({})
+        doc.save(os.path.join(dest, name), garbage=3, deflate=True, no_new_id=True)
+        doc.close()
+        corpus.append({"fichier": name, "type": kind, "langue": langue, "pages": nb_pages})
+
+    with open(os.path.join(dest, "corpus.json"), "w", encoding="utf-8") as f:
+        json.dump({"seed": seed, "count": count, "fichiers": corpus}, f, ensure_ascii=False, indent=2)
+    return corpus
+
+
+class StageTimer:
+    def __init__(self):
+        self.samples = {}
+
+    @contextmanager
+    def __call__(self, stage):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+
+    def summary(self):
+        result = {}
+        for stage, values in self.samples.items():
+            ordered = sorted(values)
+            result[stage] = {
+                "n": len(values),
+                "total_s": round(sum(values), 4),
+                "mean_ms": round(statistics.mean(values) * 1000, 3),
+                "p50_ms": round(ordered[len(ordered) // 2] * 1000, 3),
+                "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))] * 1000, 3),
+                "max_ms": round(ordered[-1] * 1000, 3),
+            }
+        return result
+
+
+def ocr_available():
+    try:
+        import pytesseract
+
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def nlp_available():
+    try:
+        nlp.get_nlp()
+        return True
+    except Exception:
+        return False
+
+
+def run_benchmark(corpus_dir, use_ocr=True, use_nlp=True, use_db=True):
+    """Traite chaque CV du corpus en chronométrant chaque étape"""
+    timer = StageTimer()
+    taxonomy = get_taxonomy()
+    skipped = []
+    if use_ocr and not ocr_available():
+        use_ocr = False
+        skipped.append("ocr (tesseract introuvable)")
+    if use_nlp and not nlp_available():
+        use_nlp = False
+        skipped.append("nlp (modèle spaCy introuvable)")
+
+    documents, rows = [], []
+    fichiers = sorted(f for f in os.listdir(corpus_dir) if f.lower().endswith(".pdf"))
+    for index, name in enumerate(fichiers):
+        with timer("total"):
+            with timer("ouverture"):
+                doc = open_pdf(os.path.join(corpus_dir, name))
+            with timer("extraction_texte"):
+                pages = [page.get_text("text") for page in doc]
+
+            scanned = [i for i, text in enumerate(pages) if page_needs_ocr(text)]
+            profile = None
+            if scanned and use_ocr:
+                with timer("detection_langue"):
+                    profile = detect_profile(doc, pages, scanned)
+            for number in scanned:
+                with timer("rasterisation"):
+                    img = render_page(doc[number])
+                if use_ocr:
+                    with timer("ocr"):
+                        pages[number] = ocr_image(img, profile)
+                del img
+            doc.close()
+
+            text = clean_text("\n".join(pages))
+            entites = None
+            if use_nlp:
+                with timer("nlp"):
+                    entites = len(nlp.extract_competences(text))
+            with timer("competences"):
+                competences = taxonomy.competences.find_all(text)
+                localite = taxonomy.find_location(text)
+
+        ville, pays = localite or ("Non spécifié", "Mauritanie")
+        rows.append(({
+            "email": f"benchmark{index:05d}@example.invalid", "nom": "Benchmark", "prenom": str(index),
+            "telephone": "", "pays": pays, "ville": ville,
+            "date_debut_dispo": date(2024, 1, 1), "date_fin_dispo": date(2024, 12, 31),
+        }, competences))
+        documents.append({
+            "fichier": name, "pages": len(pages), "pages_ocr": len(scanned),
+            "profil_ocr": profile.name if profile else None, "caracteres": len(text),
+            "competences": len(competences), "entites_nlp": entites,
+        })
+
+    if use_db and rows:
+        # Écriture réelle puis annulation : la base n'est pas modifiée
+        with transaction.atomic():
+            with timer("enregistrement"):
+                consultants, _ = bulk_upsert_consultants([row for row, _ in rows])
+                bulk_add_competences(
+                    {consultants[row["email"]].id: comps for row, comps in rows}, niveau=1
+                )
+            transaction.set_rollback(True)
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "cpu": os.cpu_count(),
+        "documents": len(documents),
+        "etapes": timer.summary(),
+        "ignore": skipped,
+        "details": documents,
+    }
+
+
+def generate_schedule(consultants, missions, participations, seed=42, start=date(2024, 1, 1), days=730):
+    """Planning synthétique : disponibilités, missions de 1 à 12 semaines, affectations aléatoires"""
+    rng = random.Random(seed)
+    usernames = {"username__startswith": "planning", "username__endswith": "@example.invalid"}
+    User.objects.bulk_create(
+        [User(username=f"planning{i:07d}@example.invalid", email=f"planning{i:07d}@example.invalid")
+         for i in range(consultants)],
+        batch_size=5000,
+    )
+    # MySQL ne renvoie pas les clés générées par bulk_create : relecture
+    users = User.objects.filter(**usernames).order_by("username").values_list("id", "email")
+    consultant_rows = []
+    for i, (user_id, email) in enumerate(users):
+        debut = start + timedelta(days=rng.randint(0, days // 2))
+        consultant_rows.append(Consultant(
+            user_id=user_id, nom="Planning", prenom=str(i), email=email, telephone="",
+            pays="Mauritanie", ville=rng.choice(["Nouakchott", "Nouadhibou", "Rosso"]),
+            date_debut_dispo=debut, date_fin_dispo=debut + timedelta(days=rng.randint(30, days)),
+        ))
+    Consultant.objects.bulk_create(consultant_rows, batch_size=5000)
+    consultant_ids = list(
+        Consultant.objects.filter(**{f"user__{key}": value for key, value in usernames.items()})
+        .order_by("id").values_list("id", flat=True)
+    )
+
+    appel_offre = AppelOffre.objects.create(
+        numero=f"PLANNING-{seed}", nom_projet="Planning", description="", budget_usd=0,
+        date_limite=start, methode_passation="", statut="",
+    )
+    mission_rows = []
+    for i in range(missions):
+        debut = start + timedelta(days=rng.randint(0, days))
+        mission_rows.append(Mission(
+            appel_offre=appel_offre, titre=f"Mission {i}", statut="",
+            date_debut=debut, date_fin=debut + timedelta(weeks=rng.randint(1, 12)),
+        ))
+    Mission.objects.bulk_create(mission_rows, batch_size=5000)
+    mission_ids = list(Mission.objects.filter(appel_offre=appel_offre).order_by("id").values_list("id", flat=True))
+
+    ParticipationMission.objects.bulk_create(
+        [ParticipationMission(mission_id=rng.choice(mission_ids), consultant_id=rng.choice(consultant_ids),
+                              role="Expert", evaluation=0)
+         for _ in range(participations)],
+        batch_size=5000,
+    )
+    return consultant_ids
+
+
+def run_staffing_benchmark(consultants=20000, missions=5000, participations=40000, queries=20, seed=42):
+    """Disponibilités et conflits sur un planning synthétique, comparés aux requêtes par consultant"""
+    timer = StageTimer()
+    rng = random.Random(seed + 1)
+    start = date(2024, 1, 1)
+    windows = []
+    for _ in range(queries):
+        debut = start + timedelta(days=rng.randint(0, 700))
+        windows.append((debut, debut + timedelta(days=rng.randint(7, 60))))
+
+    resultats = {}
+    # Écriture réelle puis annulation : la base n'est pas modifiée
+    with transaction.atomic():
+        with timer("generation"):
+            ids = generate_schedule(consultants, missions, participations, seed, start)
+        sample = rng.sample(ids, min(500, len(ids)))
+
+        for debut, fin in windows:
+            with timer("libres_count"):
+                libres = free_consultants(debut, fin).count()
+            with timer("libres_page"):
+                list(free_consultants(debut, fin).order_by("id")[:20])
+            with timer("libres_naif"):
+                # Une requête par consultant disponible, comme le ferait une boucle ORM
+                naif = sum(
+                    not bookings(debut, fin).filter(consultant_id=consultant_id).exists()
+                    for consultant_id in Consultant.objects.filter(
+                        date_debut_dispo__lte=debut, date_fin_dispo__gte=fin
+                    ).values_list("id", flat=True)
+                )
+            if naif != libres:
+                raise AssertionError(f"Résultats divergents sur {debut}-{fin} : {libres} != {naif}")
+            resultats.setdefault("libres", []).append(libres)
+
+            with timer("conflits_lot"):
+                conflicts = consultant_conflicts(sample, debut, fin)
+            with timer("conflits_naif"):
+                for consultant_id in sample:
+                    list(bookings(debut, fin).filter(consultant_id=consultant_id).values_list("mission_id", flat=True))
+            resultats.setdefault("conflits", []).append(sum(bool(c["missions"]) for c in conflicts.values()))
+
+        with timer("chevauchements_lot"):
+            doubles = consultant_conflicts(sample)
+        resultats["double_reservations"] = sum(bool(c["chevauchements"]) for c in doubles.values())
+        transaction.set_rollback(True)
+
+    return {
+        "commit": git_commit(),
+        "date": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "plateforme": platform.platform(),
+        "cpu": os.cpu_count(),
+        "planning": {"consultants": consultants, "missions": missions,
+                     "participations": participations, "fenetres": queries, "echantillon_conflits": len(sample)},
+        "etapes": timer.summary(),
+        "details": resultats,
+    }
@@ -0,0 +1,123 @@
+from django.contrib.auth.hashers import make_password
+from django.db.models.functions import Lower
+from .changes import consultants_changed
+from .models import Consultant, Competence, User
+from .skills import resolve_skills
+
+# Taille des INSERT/UPDATE groupés
+BATCH_SIZE = 500
+
+CONSULTANT_FIELDS = [
+    "nom", "prenom", "telephone", "pays", "ville", "date_debut_dispo", "date_fin_dispo",
+]
+
+
+def normalize_email(email):
+    return email.strip().lower()
+
+
+def by_email(queryset, field, emails):
+    """Lignes dont le champ email correspond à l'un des emails normalisés, sans tenir compte de la casse"""
+    return queryset.alias(cle=Lower(field)).filter(cle__in=list(emails))
+
+
+def users_by_email(emails):
+    """{email normalisé: id} des comptes existants"""
+    return {
+        normalize_email(username): user_id
+        for username, user_id in by_email(User.objects, "username", emails).values_list("username", "id")
+    }
+
+
+def bulk_add_competences(competences, niveau, batch_size=BATCH_SIZE):
+    """Ajoute les compétences absentes, {consultant_id: [noms]}, en un nombre fixe de requêtes
+
+    Les noms sont ramenés aux Skill du référentiel (créés au besoin) :
+    les variantes d'un même nom ne produisent qu'une ligne par consultant.
+    """
+    skill_ids = resolve_skills({nom for noms in competences.values() for nom in noms if nom})
+    competences = {
+        consultant_id: list(dict.fromkeys(skill_ids[nom] for nom in noms if nom in skill_ids))
+        for consultant_id, noms in competences.items()
+    }
+    existing = set(
+        Competence.objects.filter(consultant_id__in=competences.keys())
+        .values_list("consultant_id", "skill_id")
+    )
+    new = [
+        Competence(consultant_id=consultant_id, skill_id=skill_id, niveau=niveau)
+        for consultant_id, ids in competences.items()
+        for skill_id in ids
+        if (consultant_id, skill_id) not in existing
+    ]
+    Competence.objects.bulk_create(new, batch_size=batch_size, ignore_conflicts=True)
+    # bulk_create n'envoie pas post_save
+    consultants_changed(competence.consultant_id for competence in new)
+    return len(new)
+
+
+def bulk_upsert_consultants(rows, batch_size=BATCH_SIZE):
+    """Crée ou met à jour des consultants par email, en un nombre fixe de requêtes
+
+    rows : dicts contenant "email" et les champs de CONSULTANT_FIELDS.
+    Les emails sont comparés et enregistrés sans espaces ni majuscules.
+    Les comptes User manquants sont créés avec un mot de passe inutilisable
+    (pas de hachage). Retourne ({email fourni: consultant}, emails fournis créés).
+    """
+    rows = list(rows)
+    emails = [row["email"] for row in rows]
+    rows = {normalize_email(row["email"]): row for row in rows}
+    consultants = {}
+    for consultant in by_email(Consultant.objects, "email", rows.keys()).order_by("id"):
+        consultants.setdefault(normalize_email(consultant.email), consultant)
+
+    created = [email for email in rows if email not in consultants]
+    if created:
+        user_ids = users_by_email(created)
+        User.objects.bulk_create(
+            [
+                User(username=email, email=email, nom=rows[email]["nom"], role="CONSULTANT",
+                     password=make_password(None))
+                for email in created if email not in user_ids
+            ],
+            batch_size=batch_size,
+        )
+        # MySQL ne renvoie pas les clés générées par bulk_create : relecture
+        user_ids = users_by_email(created)
+        Consultant.objects.bulk_create(
+            [
+                Consultant(user_id=user_ids[email], email=email,
+                           **{field: rows[email][field] for field in CONSULTANT_FIELDS})
+                for email in created
+            ],
+            batch_size=batch_size,
+        )
+        for consultant in Consultant.objects.filter(email__in=created).order_by("id"):
+            consultants.setdefault(normalize_email(consultant.email), consultant)
+
+    # Seules les fiches dont une valeur change sont réécrites (bulk_update et nouvelle révision)
+    updated, changed_fields = [], set()
+    for email in rows:
+        if email in created:
+            continue
+        consultant = consultants[email]
+        changes = {field: rows[email][field] for field in CONSULTANT_FIELDS
+                   if getattr(consultant, field) != rows[email][field]}
+        if changes:
+            for field, value in changes.items():
+                setattr(consultant, field, value)
+            updated.append(consultant)
+            changed_fields.update(changes)
+    if updated:
+        # Un CASE par colonne : on se limite aux colonnes effectivement modifiées
+        fields = [field for field in CONSULTANT_FIELDS if field in changed_fields]
+        Consultant.objects.bulk_update(updated, fields, batch_size=batch_size)
+    consultants_changed(
+        [consultants[email].id for email in created] + [consultant.id for consultant in updated]
+    )
+
+    created = set(created)
+    return (
+        {email: consultants[normalize_email(email)] for email in emails},
+        {email for email in emails if normalize_email(email) in created},
+    )
@@ -0,0 +1,34 @@
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+from . import consultant_cache
+from .models import Consultant, MatchingChange
+
+# Identifiants par UPDATE ... WHERE id IN (...) : reste sous la limite de paramètres SQLite
+REVISION_BATCH_SIZE = 1000
+
+
+def bump_revisions(consultant_ids):
+    """Nouvelle version des fiches : revision + 1 et updated_at, dans la transaction en cours"""
+    consultant_ids = sorted(consultant_ids)
+    now = timezone.now()
+    for start in range(0, len(consultant_ids), REVISION_BATCH_SIZE):
+        Consultant.objects.filter(id__in=consultant_ids[start:start + REVISION_BATCH_SIZE]).update(
+            revision=F("revision") + 1, updated_at=now,
+        )
+
+
+def consultants_changed(consultant_ids):
+    """Fiche ou compétences modifiées : version, cache des fiches et lignes de la matrice de classement
+
+    Les changements sont journalisés après le commit : consultants.matching
+    rejoue ceux qu'il n'a pas encore intégrés.
+    """
+    consultant_ids = set(consultant_ids)
+    if not consultant_ids:
+        return
+    bump_revisions(consultant_ids)
+    consultant_cache.invalidate(consultant_ids)
+    transaction.on_commit(lambda: MatchingChange.objects.bulk_create(
+        [MatchingChange(consultant_id=consultant_id) for consultant_id in consultant_ids]
+    ))
@@ -0,0 +1,110 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Prefetch
+from .models import Competence, Consultant
+
+
+def cache_key(consultant_id):
+    return f"consultant-data:v2:{consultant_id}"
+
+
+def expertise(nb_competences):
+    return "Expert" if nb_competences >= 10 else "Intermédiaire" if nb_competences >= 5 else "Débutant"
+
+
+def consultant_payload(consultant, competence_names):
+    """Fiche au format de consultant_data (consultant chargé avec son user)"""
+    return {
+        "firstName": consultant.prenom,
+        "lastName": consultant.nom,
+        "email": consultant.user.email,
+        "phone": consultant.telephone,
+        "country": consultant.pays,
+        "city": consultant.ville,
+        "startAvailability": consultant.date_debut_dispo,
+        "endAvailability": consultant.date_fin_dispo,
+        "skills": ", ".join(competence_names),
+        "expertise": expertise(len(competence_names)),
+        "cvFilename": consultant.cv.name.split('/')[-1] if consultant.cv else None,
+    }
+
+
+def build_consultant_data(consultant_id):
+    """(version, fiche) du consultant en deux requêtes (consultant + user, compétences), None s'il n'existe pas"""
+    consultant = Consultant.objects.select_related("user").filter(id=consultant_id).first()
+    if consultant is None:
+        return None
+
+    competences_list = list(
+        Competence.objects.filter(consultant_id=consultant_id)
+        .order_by("id").values_list("skill__nom", flat=True)
+    )
+    return (consultant.revision, consultant.updated_at), consultant_payload(consultant, competences_list)
+
+
+def load_consultants(consultant_ids):
+    """{id: consultant} avec user et compétences (+ skill) chargés : deux requêtes quel que soit le nombre"""
+    return Consultant.objects.select_related("user").prefetch_related(
+        Prefetch("competences", queryset=Competence.objects.select_related("skill").order_by("id"))
+    ).in_bulk(consultant_ids)
+
+
+def consultant_version(consultant_id):
+    """Version (revision, updated_at) du consultant en une requête sur la clé primaire, None s'il n'existe pas"""
+    return Consultant.objects.filter(id=consultant_id).values_list("revision", "updated_at").first()
+
+
+def get_consultant_data(consultant_id, version=None):
+    """Fiche du consultant depuis le cache, construite au premier accès
+
+    Le cache conserve la version de la fiche : si version est donnée et
+    diffère (invalidation pas encore passée après un commit), la fiche est
+    reconstruite plutôt que servie sous une version qui n'est pas la sienne.
+    """
+    key = cache_key(consultant_id)
+    entry = cache.get(key)
+    if entry is not None and (version is None or entry["version"] == tuple(version)):
+        return entry["data"]
+
+    built = build_consultant_data(consultant_id)
+    if built is None:
+        return None
+    version, data = built
+    cache.set(key, {"version": version, "data": data}, settings.CONSULTANT_CACHE_TIMEOUT)
+    return data
+
+
+async def aconsultant_version(consultant_id):
+    return await Consultant.objects.filter(id=consultant_id).values_list("revision", "updated_at").afirst()
+
+
+async def aget_consultant_data(consultant_id, version=None):
+    """get_consultant_data pour les vues asynchrones (cache et ORM asynchrones)"""
+    key = cache_key(consultant_id)
+    entry = await cache.aget(key)
+    if entry is not None and (version is None or entry["version"] == tuple(version)):
+        return entry["data"]
+
+    consultant = await Consultant.objects.select_related("user").filter(id=consultant_id).afirst()
+    if consultant is None:
+        return None
+    competences_list = [
+        nom async for nom in Competence.objects.filter(consultant_id=consultant_id)
+        .order_by("id").values_list("skill__nom", flat=True)
+    ]
+    data = consultant_payload(consultant, competences_list)
+    await cache.aset(key, {"version": (consultant.revision, consultant.updated_at), "data": data},
+                     settings.CONSULTANT_CACHE_TIMEOUT)
+    return data
+
+
+def invalidate(consultant_ids):
+    """Supprime les fiches en cache, après le commit de la transaction en cours
+
+    Supprimer avant le commit laisserait une lecture concurrente remettre en
+    cache l'ancienne version.
+    """
+    keys = [cache_key(consultant_id) for consultant_id in set(consultant_ids)]
+    if keys:
+        transaction.on_commit(lambda: cache.delete_many(keys))
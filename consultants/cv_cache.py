@@ -0,0 +1,98 @@
+import hashlib
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Count, Sum
+from django.utils import timezone
+from .models import CVCache
+
+# Les clés de CVCache.competences correspondent à l'extracteur utilisé
+NLP = "nlp"
+MOTS_CLES = "mots_cles"
+
+# Écritures depuis la dernière éviction (par processus)
+_puts = 0
+
+
+def file_sha256(path, chunk_size=1024 * 1024):
+    """Empreinte SHA-256 du contenu du fichier"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def bytes_sha256(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+def get(sha256):
+    """Entrée du cache pour ce contenu, ou None"""
+    return get_many([sha256]).get(sha256)
+
+
+def get_many(sha256_list):
+    """Recherche groupée, les entrées trouvées sont marquées comme récemment utilisées"""
+    entries = {e.sha256: e for e in CVCache.objects.filter(sha256__in=set(sha256_list))}
+    if entries:
+        CVCache.objects.filter(sha256__in=entries.keys()).update(last_used_at=timezone.now())
+    return entries
+
+
+def put(sha256, texte, ocr, competences=None):
+    put_many([(sha256, texte, ocr, competences)])
+
+
+def put_many(entries):
+    """Ajoute ou complète des entrées (sha256, texte, ocr, competences)
+
+    Les limites sont appliquées toutes les CV_CACHE_EVICT_EVERY écritures
+    seulement : evict parcourt la table.
+    """
+    global _puts
+    if not entries:
+        return
+
+    with transaction.atomic():
+        existing = {
+            e.sha256: e
+            for e in CVCache.objects.select_for_update().filter(sha256__in=[entry[0] for entry in entries])
+        }
+        for sha256, texte, ocr, competences in entries:
+            entry = existing.get(sha256)
+            if entry is None:
+                entry = existing[sha256] = CVCache(sha256=sha256)
+            entry.texte = texte
+            entry.ocr = ocr
+            entry.taille = len(texte.encode("utf-8"))
+            entry.competences = {**(entry.competences or {}), **(competences or {})}
+            entry.save()
+
+    _puts += len(entries)
+    if _puts >= settings.CV_CACHE_EVICT_EVERY:
+        _puts = 0
+        evict()
+
+
+def evict(max_entries=None, max_bytes=None, batch_size=1000):
+    """Supprime les entrées les moins récemment utilisées au-delà de CV_CACHE_MAX_ENTRIES et CV_CACHE_MAX_BYTES"""
+    max_entries = max_entries if max_entries is not None else settings.CV_CACHE_MAX_ENTRIES
+    max_bytes = max_bytes if max_bytes is not None else settings.CV_CACHE_MAX_BYTES
+    totals = CVCache.objects.aggregate(entries=Count("id"), size=Sum("taille"))
+    excess_entries = totals["entries"] - max_entries
+    excess_bytes = (totals["size"] or 0) - max_bytes
+    if excess_entries <= 0 and excess_bytes <= 0:
+        return 0
+
+    # Parcours des plus anciennes jusqu'à repasser sous les deux limites
+    old_ids = []
+    for entry_id, taille in CVCache.objects.order_by("last_used_at", "id").values_list("id", "taille").iterator():
+        if excess_entries <= 0 and excess_bytes <= 0:
+            break
+        old_ids.append(entry_id)
+        excess_entries -= 1
+        excess_bytes -= taille
+    return sum(
+        CVCache.objects.filter(id__in=old_ids[i:i + batch_size]).delete()[0]
+        for i in range(0, len(old_ids), batch_size)
+    )
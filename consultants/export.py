@@ -0,0 +1,90 @@
+import csv
+import io
+import zlib
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Prefetch
+from .models import Competence, Consultant
+
+CHUNK_SIZE = 1000
+
+FIELDS = [
+    "id", "nom", "prenom", "email", "telephone", "pays", "ville",
+    "date_debut_dispo", "date_fin_dispo", "cv", "created_at", "updated_at",
+]
+
+FORMATS = {
+    "csv": ("text/csv; charset=utf-8", "csv"),
+    "ndjson": ("application/x-ndjson", "ndjson"),
+}
+
+
+def iter_chunks(chunk_size=CHUNK_SIZE):
+    """Consultants par paquets, compétences jointes : une requête consultants + une compétences par paquet
+
+    Parcours par clé (id > dernier id) plutôt qu'un curseur serveur : la
+    mémoire reste bornée au paquet sur tous les moteurs, y compris MySQL
+    dont le client charge sinon tout le résultat.
+    """
+    competences = Competence.objects.select_related("skill").only(
+        "consultant_id", "niveau", "skill__nom"
+    ).order_by("id")
+    last_id = 0
+    while True:
+        chunk = list(
+            Consultant.objects.filter(id__gt=last_id).order_by("id").only(*FIELDS)
+            .prefetch_related(Prefetch("competences", queryset=competences))[:chunk_size]
+        )
+        if not chunk:
+            return
+        yield chunk
+        last_id = chunk[-1].id
+
+
+def consultant_row(consultant):
+    row = {field: getattr(consultant, field) for field in FIELDS}
+    row["cv"] = consultant.cv.name or None
+    row["competences"] = [{"nom": c.skill.nom, "niveau": c.niveau} for c in consultant.competences.all()]
+    return row
+
+
+def csv_chunks(chunks):
+    """En-tête puis un bloc de lignes CSV par paquet ; compétences au format nom:niveau;nom:niveau"""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow([*FIELDS, "competences"])
+    for chunk in chunks:
+        for consultant in chunk:
+            row = consultant_row(consultant)
+            competences = ";".join(f"{c['nom']}:{c['niveau']}" for c in row.pop("competences"))
+            writer.writerow([*("" if value is None else value for value in row.values()), competences])
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def ndjson_chunks(chunks):
+    """Un objet JSON par ligne, un bloc par paquet"""
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for chunk in chunks:
+        yield "".join(encoder.encode(consultant_row(consultant)) + "\n" for consultant in chunk)
+
+
+def gzip_chunks(blocks):
+    """Compression gzip au fil de l'eau"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    for block in blocks:
+        data = compressor.compress(block)
+        if data:
+            yield data
+    yield compressor.flush()
+
+
+def export_consultants(export_format="csv", gzip=False, chunk_size=CHUNK_SIZE):
+    """Blocs d'octets de l'export complet des consultants (csv ou ndjson), éventuellement gzip"""
+    if export_format not in FORMATS:
+        raise ValueError(f"Format inconnu : {export_format} (csv ou ndjson)")
+    render = csv_chunks if export_format == "csv" else ndjson_chunks
+    blocks = (block.encode("utf-8") for block in render(iter_chunks(chunk_size)))
+    return gzip_chunks(blocks) if gzip else blocks
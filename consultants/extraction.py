@@ -0,0 +1,278 @@
+import importlib.util
+import os
+import re
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from django.conf import settings
+from . import cv_cache, nlp
+from .metrics import span
+from .ocr import SAMPLE_DPI, default_profile, ocr_image, profile_for_text
+
+# fitz, PIL et pytesseract sont importés à la demande : seul le traitement des CV en a besoin
+OCR_AVAILABLE = importlib.util.find_spec("pytesseract") is not None
+
+# En dessous de ce nombre de caractères, la page est considérée comme scannée
+MIN_PAGE_CHARS = 20
+
+OCR_DPI = 300
+
+# Hauteur (en lignes) des bandes traitées à la fois lors du prétraitement
+PREPROCESS_BAND = 128
+
+
+def default_ocr_workers():
+    return min(4, os.cpu_count() or 1)
+
+
+def clean_text(text):
+    """Nettoyage du texte pour l'analyse"""
+    replacements = [
+        (r"\s+", " "),
+        (r"\s?[@\.]\s?", lambda m: m.group().strip()),
+        (r"ﬁ", "fi"),
+        (r"ﬂ", "fl"),
+    ]
+
+    for pattern, replacement in replacements:
+        text = re.sub(pattern, replacement, text)
+
+    return text.strip()
+
+
+def page_needs_ocr(text):
+    """Page sans couche texte exploitable"""
+    return len(text.strip()) < MIN_PAGE_CHARS
+
+
+def enhance_contrast(pixels, factor, band=PREPROCESS_BAND):
+    """Équivalent de ImageEnhance.Contrast, appliqué sur place par table de correspondance"""
+    import numpy as np
+
+    mean = int(pixels.mean() + 0.5)
+    lut = np.clip(mean + factor * (np.arange(256) - mean) + 0.5, 0, 255).astype(np.uint8)
+    for start in range(0, pixels.shape[0], band):
+        pixels[start:start + band] = lut[pixels[start:start + band]]
+
+
+def sharpen(pixels, factor, band=PREPROCESS_BAND):
+    """Équivalent de ImageEnhance.Sharpness, appliqué sur place par bandes de lignes
+
+    Lissage PIL (noyau SMOOTH 3x3, poids central 5, somme 13) puis
+    extrapolation img + (factor - 1) * (img - lissé) ; les bords ne changent pas.
+    Seule la ligne originale au-dessus de la bande courante est conservée, si
+    bien que la mémoire supplémentaire reste proportionnelle à la bande.
+    """
+    import numpy as np
+
+    height, width = pixels.shape
+    if height < 3 or width < 3:
+        return
+
+    above = pixels[0].astype(np.int32)
+    for start in range(1, height - 1, band):
+        stop = min(start + band, height - 1)
+        # Lignes originales start-1 .. stop : la bande et ses deux voisines
+        block = np.empty((stop - start + 2, width), dtype=np.int32)
+        block[0] = above
+        block[1:] = pixels[start:stop + 1]
+        above = block[-2].copy()
+
+        center = block[1:-1, 1:-1]
+        total = (
+            block[:-2, :-2] + block[:-2, 1:-1] + block[:-2, 2:]
+            + block[1:-1, :-2] + 5 * center + block[1:-1, 2:]
+            + block[2:, :-2] + block[2:, 1:-1] + block[2:, 2:]
+        )
+        smooth = (total + 6) // 13
+        result = smooth + factor * (center - smooth)
+        pixels[start:stop, 1:-1] = np.clip(result + 0.5, 0, 255).astype(np.uint8)
+
+
+def render_page(page, dpi=OCR_DPI, band=PREPROCESS_BAND):
+    """Rendu en niveaux de gris et prétraitement de l'image pour Tesseract
+
+    La page est rendue en RGB puis convertie en gris par PIL bande par bande
+    (même conversion que Image.convert("L")) dans un seul tableau NumPy,
+    prétraité sur place puis exposé à PIL sans copie.
+    """
+    import numpy as np
+    from PIL import Image
+
+    pix = page.get_pixmap(dpi=dpi, alpha=False)
+    width, height, stride = pix.width, pix.height, pix.stride
+    pixels = np.empty((height, width), dtype=np.uint8)
+    samples = pix.samples_mv
+    for start in range(0, height, band):
+        stop = min(start + band, height)
+        rgb = Image.frombuffer("RGB", (width, stop - start), samples[start * stride:stop * stride],
+                               "raw", "RGB", stride, 1)
+        pixels[start:stop] = np.asarray(rgb.convert("L"))
+    del samples, pix
+
+    enhance_contrast(pixels, 3.0)
+    sharpen(pixels, 2.0)
+
+    img = Image.frombuffer("L", (width, height), pixels, "raw", "L", 0, 1)
+    # Le buffer de l'image appartient au tableau : il doit vivre aussi longtemps qu'elle
+    img.pixels = pixels
+    return img
+
+
+def detect_profile(doc, pages=None, to_ocr=None):
+    """Profil OCR du document d'après sa couche texte, sinon d'après un échantillon
+
+    L'échantillon est la première page à OCR rendue en basse résolution et lue
+    avec tous les modèles ; le reste du document n'utilise que les modèles utiles.
+    """
+    if pages is None:
+        pages = [page.get_text("text") for page in doc]
+    if to_ocr is None:
+        to_ocr = [i for i, text in enumerate(pages) if page_needs_ocr(text)]
+
+    with span("detection_langue") as attrs:
+        to_ocr_set = set(to_ocr)
+        profile = profile_for_text("\n".join(t for i, t in enumerate(pages) if i not in to_ocr_set))
+        attrs["source"] = "couche_texte"
+        if profile is None and to_ocr:
+            sample = render_page(doc[to_ocr[0]], dpi=SAMPLE_DPI)
+            profile = profile_for_text(ocr_image(sample, default_profile()))
+            attrs["source"] = "echantillon"
+        if profile is None:
+            profile = default_profile()
+            attrs["source"] = "defaut"
+        attrs["profil"] = profile.name
+    return profile
+
+
+def ocr_pages(doc, page_numbers, profile, max_workers=None):
+    """OCR des pages demandées, résultat {numéro de page: texte}
+
+    PyMuPDF n'est pas thread-safe : le rendu reste dans le thread appelant,
+    seuls les appels à Tesseract (processus externe) partent dans le pool.
+    Le nombre d'images en attente est borné pour limiter la mémoire.
+    """
+    max_workers = max_workers or default_ocr_workers()
+    results = {}
+    pending = {}
+
+    def collect(done):
+        for future in done:
+            results[pending.pop(future)] = future.result()
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for number in page_numbers:
+            if len(pending) >= 2 * max_workers:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                collect(done)
+            img = render_page(doc[number])
+            pending[executor.submit(ocr_image, img, profile)] = number
+        collect(wait(pending).done)
+
+    return results
+
+
+def extract_pages(doc, profile=None, max_workers=None):
+    """Texte de chaque page dans l'ordre : couche texte si présente, OCR sinon
+
+    Sans profil imposé, les langues sont détectées (voir detect_profile).
+    Retourne (liste des textes par page, nombre de pages passées à l'OCR).
+    """
+    with span("couche_texte", pages=len(doc)):
+        pages = [page.get_text("text") for page in doc]
+    to_ocr = [i for i, text in enumerate(pages) if page_needs_ocr(text)]
+
+    if not to_ocr or not OCR_AVAILABLE:
+        return pages, 0
+
+    profile = profile or detect_profile(doc, pages, to_ocr)
+    with span("ocr", pages=len(to_ocr), profil=profile.name) as attrs:
+        for number, text in ocr_pages(doc, to_ocr, profile, max_workers).items():
+            pages[number] = text
+        attrs["caracteres"] = sum(len(pages[number]) for number in to_ocr)
+    return pages, len(to_ocr)
+
+
+def extract_text(doc, profile=None, max_workers=None):
+    """Texte nettoyé du document et nombre de pages OCR"""
+    with span("extraction", pages=len(doc)) as attrs:
+        pages, ocr_count = extract_pages(doc, profile, max_workers)
+        text = clean_text("\n".join(pages))
+        attrs.update(pages_ocr=ocr_count, caracteres=len(text))
+    return text, ocr_count
+
+
+def open_pdf(source):
+    """Ouvre un PDF depuis un chemin, des octets ou un fichier envoyé
+
+    Les uploads Django volumineux sont déjà sur disque (fichier temporaire) :
+    ils sont ouverts sur place, sans copie ; les autres sont lus en mémoire.
+    """
+    import fitz
+
+    if isinstance(source, (str, os.PathLike)):
+        return fitz.open(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return fitz.open(stream=source, filetype="pdf")
+    if hasattr(source, "temporary_file_path"):
+        return fitz.open(source.temporary_file_path())
+
+    source.seek(0)
+    try:
+        return fitz.open(stream=source.read(), filetype="pdf")
+    finally:
+        source.seek(0)
+
+
+def check_page_count(doc):
+    if len(doc) > settings.CV_MAX_PAGES:
+        raise ValueError(f"Le CV dépasse {settings.CV_MAX_PAGES} pages ({len(doc)}).")
+
+
+def check_cv_pdf(source):
+    """PDF lisible et nombre de pages (ValueError sinon) ; source au format de open_pdf"""
+    try:
+        doc = open_pdf(source)
+    except Exception:
+        raise ValueError("Le CV doit être un fichier PDF valide.")
+    with doc:
+        check_page_count(doc)
+
+
+def check_cv_size(size):
+    if size > settings.CV_UPLOAD_MAX_SIZE:
+        raise ValueError(f"Le CV dépasse la taille maximale ({settings.CV_UPLOAD_MAX_SIZE // (1024 * 1024)} Mo).")
+
+
+def validate_cv_upload(cv_file):
+    """Contrôles avant stockage : taille, PDF lisible, nombre de pages (ValueError sinon)"""
+    check_cv_size(cv_file.size)
+    check_cv_pdf(cv_file)
+
+
+def extract_competences_from_cv(data, on_progress=None):
+    """Extraction d'un CV à partir de son contenu : (compétences, texte, sha256)
+
+    Lève les exceptions, voir jobs.run_job.
+    """
+    def progress(pourcentage, etape):
+        if on_progress:
+            on_progress(pourcentage, etape)
+
+    progress(5, "cache")
+    sha256 = cv_cache.bytes_sha256(data)
+    cached = cv_cache.get(sha256)
+    if cached and cv_cache.NLP in cached.competences:
+        return cached.competences[cv_cache.NLP], cached.texte, sha256
+
+    if cached:
+        text, ocr = cached.texte, cached.ocr
+    else:
+        progress(10, "lecture")
+        with open_pdf(data) as doc:
+            check_page_count(doc)
+            text, ocr_pages = extract_text(doc, max_workers=settings.CV_OCR_WORKERS)
+        ocr = ocr_pages > 0
+
+    progress(70, "nlp")
+    competences = nlp.extract_competences(text)
+    cv_cache.put(sha256, text, ocr, {cv_cache.NLP: competences})
+    return competences, text, sha256
@@ -0,0 +1,90 @@
+import re
+from django.db import connection
+from .models import CVTexte
+
+# Termes retenus d'une requête ; sous MySQL, les mots plus courts que
+# innodb_ft_min_token_size (3 par défaut) ne sont pas indexés
+MAX_TERMS = 10
+MYSQL_MIN_TERM_LENGTH = 3
+
+SNIPPET_LENGTH = 200
+
+FTS_TABLE = "consultants_cvtexte_fts"
+
+
+def index_cv_texts(entries):
+    """Enregistre le texte des CV, {consultant_id: (sha256, texte)} ; l'index suit (FULLTEXT ou triggers FTS5)"""
+    rows = [
+        CVTexte(consultant_id=consultant_id, sha256=sha256, texte=texte)
+        for consultant_id, (sha256, texte) in entries.items()
+        if texte
+    ]
+    CVTexte.objects.bulk_create(
+        rows,
+        update_conflicts=True,
+        unique_fields=["consultant"],
+        update_fields=["sha256", "texte", "updated_at"],
+    )
+    return len(rows)
+
+
+def search_terms(query):
+    terms = list(dict.fromkeys(word.casefold() for word in re.findall(r"\w+", query)))
+    if connection.vendor == "mysql":
+        terms = [term for term in terms if len(term) >= MYSQL_MIN_TERM_LENGTH]
+    return terms[:MAX_TERMS]
+
+
+def make_snippet(texte, terms, length=SNIPPET_LENGTH):
+    """Extrait du texte centré sur la première occurrence d'un des termes"""
+    match = re.search("|".join(re.escape(term) for term in terms), texte, re.IGNORECASE) if terms else None
+    start = max(0, match.start() - length // 3) if match else 0
+    snippet = texte[start:start + length].strip()
+    return ("…" if start else "") + snippet + ("…" if start + length < len(texte) else "")
+
+
+def search_mysql(terms, limit):
+    # Mode booléen : tous les termes sont requis, le score MATCH sert au classement
+    against = " ".join(f"+{term}" for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT consultant_id, MATCH(texte) AGAINST (%s IN BOOLEAN MODE) AS score, texte "
+            "FROM consultants_cvtexte WHERE MATCH(texte) AGAINST (%s IN BOOLEAN MODE) "
+            "ORDER BY score DESC LIMIT %s",
+            [against, against, limit],
+        )
+        return [(cid, float(score), make_snippet(texte, terms)) for cid, score, texte in cursor.fetchall()]
+
+
+def search_sqlite(terms, limit):
+    # Termes entre guillemets : aucun n'est interprété comme opérateur FTS5
+    match = " ".join('"{}"'.format(term.replace('"', '""')) for term in terms)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT t.consultant_id, -bm25({FTS_TABLE}) AS score, "
+            f"snippet({FTS_TABLE}, 0, '', '', '…', 32) "
+            f"FROM {FTS_TABLE} JOIN consultants_cvtexte t ON t.id = {FTS_TABLE}.rowid "
+            f"WHERE {FTS_TABLE} MATCH %s ORDER BY bm25({FTS_TABLE}) LIMIT %s",
+            [match, limit],
+        )
+        return [(cid, score, snippet) for cid, score, snippet in cursor.fetchall()]
+
+
+def search_fallback(terms, limit):
+    # Autres moteurs : sans index plein texte ni classement
+    queryset = CVTexte.objects.all()
+    for term in terms:
+        queryset = queryset.filter(texte__icontains=term)
+    return [
+        (cid, 0.0, make_snippet(texte, terms))
+        for cid, texte in queryset.order_by("consultant_id").values_list("consultant_id", "texte")[:limit]
+    ]
+
+
+def search_cv_texts(query, limit=20):
+    """[(consultant_id, score, extrait)] des CV contenant tous les termes, du plus pertinent au moins pertinent"""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    search = {"mysql": search_mysql, "sqlite": search_sqlite}.get(connection.vendor, search_fallback)
+    return search(terms, limit)
@@ -0,0 +1,162 @@
+import csv
+import io
+import logging
+import os
+import time
+import zipfile
+from datetime import datetime
+from django.db import DatabaseError, transaction
+from rest_framework.exceptions import ValidationError
+from .bulk import BATCH_SIZE, bulk_add_competences, bulk_upsert_consultants
+from .serializers import ConsultantImportSerializer
+
+logger = logging.getLogger(__name__)
+
+# Erreurs détaillées conservées dans le rapport (les suivantes sont seulement comptées)
+MAX_ERRORS = 1000
+
+EXTENSIONS = (".csv", ".xlsx")
+
+
+def read_csv(fileobj):
+    """Lignes d'un CSV binaire UTF-8 (en-tête en première ligne), lues au fil de l'eau"""
+    yield from csv.DictReader(io.TextIOWrapper(fileobj, encoding="utf-8-sig", newline=""))
+
+
+def read_xlsx(fileobj):
+    """Lignes de la première feuille d'un classeur Excel, en lecture seule (mémoire constante)"""
+    from openpyxl import load_workbook
+    from openpyxl.utils.exceptions import InvalidFileException
+
+    try:
+        workbook = load_workbook(fileobj, read_only=True, data_only=True)
+    except (zipfile.BadZipFile, InvalidFileException, KeyError) as e:
+        # Archive corrompue ou sans classeur (KeyError : partie xl/ absente)
+        raise ValueError("Fichier .xlsx illisible") from e
+    try:
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+        header = [str(value).strip() if value is not None else "" for value in next(rows, [])]
+        for values in rows:
+            if not any(value is not None for value in values):
+                continue
+            yield {
+                name: value.date() if isinstance(value, datetime) else ("" if value is None else value)
+                for name, value in zip(header, values)
+                if name
+            }
+    finally:
+        workbook.close()
+
+
+def read_rows(fileobj, filename):
+    extension = os.path.splitext(filename)[1].lower()
+    if extension == ".csv":
+        return read_csv(fileobj)
+    if extension == ".xlsx":
+        return read_xlsx(fileobj)
+    raise ValueError(f"Format non pris en charge : {extension or filename} (attendu : .csv ou .xlsx)")
+
+
+def parse_competences(value):
+    """« Python:3;Django » -> {niveau: [noms]} (niveau 1 par défaut)"""
+    by_niveau = {}
+    for item in value.split(";"):
+        nom, _, niveau = item.rpartition(":") if ":" in item else (item, "", "")
+        nom = nom.strip()
+        if nom:
+            by_niveau.setdefault(int(niveau) if niveau.strip().isdigit() else 1, []).append(nom)
+    return by_niveau
+
+
+def add_error(report, line, email, erreurs):
+    report["erreurs"] += 1
+    if len(report["details"]) < MAX_ERRORS:
+        report["details"].append({"ligne": line, "email": email, "erreurs": erreurs})
+
+
+def save_rows(valid, report):
+    """Enregistre des lignes validées [(ligne, données)] en une transaction"""
+    with transaction.atomic():
+        consultants, created = bulk_upsert_consultants([row for _, row in valid])
+        by_niveau, competences = {}, 0
+        for _, row in valid:
+            consultant_id = consultants[row["email"]].id
+            for niveau, noms in parse_competences(row["competences"]).items():
+                by_niveau.setdefault(niveau, {}).setdefault(consultant_id, []).extend(noms)
+        for niveau, noms in by_niveau.items():
+            competences += bulk_add_competences(noms, niveau)
+    report["competences"] += competences
+    report["crees"] += len(created)
+    report["existants"] += len(consultants) - len(created)
+
+
+def import_batch(batch, report):
+    """Valide un paquet de (ligne, données) puis enregistre les lignes valides en une transaction
+
+    Si l'écriture groupée échoue (contrainte en base), le paquet est repris
+    ligne par ligne pour isoler les lignes fautives, qui rejoignent les erreurs.
+    """
+    # Une instance par paquet, comme ListSerializer : les champs ne sont construits qu'une fois
+    serializer = ConsultantImportSerializer()
+    valid = []
+    for line, row in batch:
+        try:
+            valid.append((line, serializer.run_validation(row)))
+        except ValidationError as e:
+            add_error(report, line, row.get("email"), e.detail)
+    if not valid:
+        return
+
+    try:
+        save_rows(valid, report)
+        return
+    except DatabaseError as e:
+        logger.warning("Import groupé impossible, reprise ligne par ligne : %s", e)
+
+    for line, row in valid:
+        try:
+            save_rows([(line, row)], report)
+        except DatabaseError as e:
+            add_error(report, line, row["email"], {"non_field_errors": [f"Erreur DB: {e}"]})
+
+
+def import_consultants(rows, batch_size=BATCH_SIZE):
+    """Importe des lignes (dicts) par paquets : validation, upsert par email, compétences
+
+    Les comptes User sont créés avec un mot de passe inutilisable (voir
+    bulk_upsert_consultants) : pas de hachage, le consultant définit son mot
+    de passe plus tard. Retourne le rapport (compteurs, lignes/s, erreurs par ligne).
+
+    Chaque paquet est validé puis enregistré dans sa propre transaction. Si le
+    fichier devient illisible en cours de route (encodage, archive), les
+    lignes déjà lues sont enregistrées et la lecture s'arrête : "interruption"
+    indique la ligne et l'erreur, les compteurs ce qui a été enregistré.
+    """
+    report = {"lignes": 0, "crees": 0, "existants": 0, "competences": 0, "erreurs": 0, "details": [],
+              "interruption": None}
+    start = time.perf_counter()
+    batch = []
+    # Ligne 1 : en-tête
+    rows = iter(rows)
+    line = 2
+    while True:
+        try:
+            row = next(rows, None)
+        except ValueError as e:
+            report["interruption"] = {"ligne": line, "erreur": str(e)}
+            row = None
+        if row is None:
+            break
+        report["lignes"] += 1
+        batch.append((line, row))
+        line += 1
+        if len(batch) >= batch_size:
+            import_batch(batch, report)
+            batch = []
+    if batch:
+        import_batch(batch, report)
+
+    duree = time.perf_counter() - start
+    report["duree_s"] = round(duree, 3)
+    report["lignes_par_s"] = round(report["lignes"] / duree, 1) if duree else None
+    return report
@@ -0,0 +1,91 @@
+import logging
+from datetime import timedelta
+from django.core.files.storage import default_storage
+from django.db import transaction
+from django.utils import timezone
+from .models import CVJob
+from .bulk import bulk_add_competences
+from .fulltext import index_cv_texts
+from .metrics import profile_if_slow, span
+from .extraction import extract_competences_from_cv
+
+logger = logging.getLogger(__name__)
+
+# Nombre maximum d'essais avant de laisser un job en échec
+MAX_TENTATIVES = 3
+
+
+def enqueue_cv_job(consultant, fichier):
+    """Ajoute un CV (chemin dans default_storage) à la file d'attente"""
+    return CVJob.objects.create(consultant=consultant, fichier=fichier)
+
+
+def claim_next_job():
+    """Réserve le prochain job en attente sans bloquer les autres workers"""
+    with transaction.atomic():
+        job = (
+            CVJob.objects.select_for_update(skip_locked=True)
+            .filter(statut=CVJob.EN_ATTENTE)
+            .order_by("id")
+            .first()
+        )
+        if job is None:
+            return None
+
+        job.statut = CVJob.EN_COURS
+        job.progression = 0
+        job.etape = "demarrage"
+        job.started_at = timezone.now()
+        job.tentatives += 1
+        job.save(update_fields=["statut", "progression", "etape", "started_at", "tentatives"])
+        return job
+
+
+def update_progress(job, progression, etape):
+    CVJob.objects.filter(pk=job.pk).update(progression=progression, etape=etape)
+
+
+def run_job(job):
+    """Extraction des compétences puis enregistrement, l'état est conservé dans le job"""
+    try:
+        with profile_if_slow(f"job-cv-{job.pk}"), span("job_cv", job=job.pk) as attrs:
+            # Lecture via le storage : fonctionne aussi hors système de fichiers local
+            with span("lecture_storage") as lecture:
+                with default_storage.open(job.fichier, "rb") as f:
+                    data = f.read()
+                lecture["octets"] = len(data)
+            competences, texte, sha256 = extract_competences_from_cv(
+                data,
+                on_progress=lambda pourcentage, etape: update_progress(job, pourcentage, etape),
+            )
+            attrs["competences"] = len(competences)
+
+            update_progress(job, 90, "enregistrement")
+            with span("enregistrement", competences=len(competences)), transaction.atomic():
+                bulk_add_competences({job.consultant_id: competences}, niveau=1)
+                index_cv_texts({job.consultant_id: (sha256, texte)})
+
+                job.statut = CVJob.TERMINE
+                job.progression = 100
+                job.etape = "termine"
+                job.competences = competences
+                job.erreur = None
+                job.finished_at = timezone.now()
+                job.save()
+
+    except Exception as e:
+        logger.exception("Erreur traitement job CV #%s", job.pk)
+        job.statut = CVJob.EN_ATTENTE if job.tentatives < MAX_TENTATIVES else CVJob.ECHEC
+        job.erreur = str(e)
+        job.finished_at = timezone.now() if job.statut == CVJob.ECHEC else None
+        job.save(update_fields=["statut", "erreur", "finished_at"])
+
+    return job
+
+
+def requeue_stale_jobs(timeout=timedelta(minutes=30)):
+    """Remet en attente les jobs restés EN_COURS après l'arrêt brutal d'un worker"""
+    return CVJob.objects.filter(
+        statut=CVJob.EN_COURS,
+        started_at__lt=timezone.now() - timeout,
+    ).update(statut=CVJob.EN_ATTENTE, etape="relance")
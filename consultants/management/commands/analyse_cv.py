@@ -1,35 +1,26 @@
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import django
+from django.conf import settings
 from django.core.management.base import BaseCommand
-from django.db import transaction
+from django.db import connections, transaction
 from dateutil.parser import parse as parse_date
+import io
 import re
 import os
+import time
 import fitz
 import logging
-from PIL import Image, ImageEnhance
-from consultants.models import Consultant, Competence
-
-try:
-    import pytesseract
-    OCR_AVAILABLE = True
-except ImportError:
-    OCR_AVAILABLE = False
+from consultants.models import CVManifest
+from consultants.bulk import bulk_add_competences, bulk_upsert_consultants
+from consultants.fulltext import index_cv_texts
+from consultants.extraction import OCR_AVAILABLE, check_page_count, clean_text, extract_text
+from consultants import cv_cache
+from consultants.taxonomy import get_taxonomy
+from consultants.metrics import span
 
 logger = logging.getLogger(__name__)
 
-# Configuration des villes Mauritanie
-CITY_COUNTRY_MAP = {
-    "Nouakchott": "Mauritanie",
-    "Nouadhibou": "Mauritanie",
-    "Rosso": "Mauritanie",
-    "Kaédi": "Mauritanie",
-    "Zouérat": "Mauritanie",
-    "Atar": "Mauritanie",
-    "Kiffa": "Mauritanie",
-    "Sélibaby": "Mauritanie",
-    "Aïoun": "Mauritanie",
-    "Tidjikja": "Mauritanie",
-}
-
 COMMON_FRENCH_NAMES = {
     "mohamed", "mariem", "fatimetou", "abdallah", "aichetou",
     "jean", "marie", "pierre", "sophie", "nouha", "ahmed",
@@ -41,84 +32,305 @@ COMMON_TITLES = {
     "technicien", "spécialiste", "analyste", "consultant", "cv"
 }
 
+
+def default_workers():
+    """Processus d'extraction tels que processus x CV_OCR_WORKERS x CV_OCR_THREADS <= cœurs"""
+    return max(1, (os.cpu_count() or 1) // (settings.CV_OCR_WORKERS * settings.CV_OCR_THREADS))
+
+
+def analyse_file(task):
+    """Traitement d'un PDF dans un processus du pool (sans accès à la base)"""
+    path, sha256, cached, ocr_workers = task
+    output = io.StringIO()
+    command = Command(stdout=output)
+    result = {
+        "path": path, "sha256": sha256, "cached": cached is not None, "inchange": False,
+        "texte": None, "ocr": False, "data": None, "timings": {}, "error": None,
+    }
+
+    try:
+        start = time.perf_counter()
+        if cached:
+            text, ocr = cached
+        else:
+            with fitz.open(path) as doc:
+                # Au-delà de CV_MAX_PAGES : fichier en échec, comme à l'inscription
+                check_page_count(doc)
+                text, ocr = command.extract_text_and_ocr_flag(doc, ocr_workers)
+            result["texte"], result["ocr"] = text, ocr
+        result["timings"]["extraction"] = time.perf_counter() - start
+
+        if text:
+            start = time.perf_counter()
+            with span("parsing", caracteres=len(text)):
+                result["data"] = command.parse_cv_data(text)
+            if result["data"]:
+                # Texte conservé pour la recherche plein texte
+                result["data"].update(texte=text, sha256=sha256)
+            result["timings"]["parsing"] = time.perf_counter() - start
+        else:
+            command.stdout.write("Aucun texte détecté - Vérifier le format du PDF")
+    except Exception as e:
+        result["error"] = str(e)
+
+    result["messages"] = output.getvalue()
+    return result
+
+
 class Command(BaseCommand):
     help = "Extraction des informations de CV PDF"
 
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default=os.path.join(settings.MEDIA_ROOT, "cvs"),
+                            help="Dossier contenant les CV PDF")
+        parser.add_argument("--workers", type=int, default=default_workers(),
+                            help="Nombre de processus d'extraction (1 = sans pool)")
+        parser.add_argument("--chunk-size", type=int, default=4,
+                            help="Nombre de PDF envoyés à la fois à chaque processus")
+        parser.add_argument("--batch-size", type=int, default=50,
+                            help="Nombre de consultants enregistrés par transaction")
+        parser.add_argument("--retry-failed", action="store_true",
+                            help="Retraite les fichiers en échec lors d'une exécution précédente")
+        parser.add_argument("--ocr-threads", type=int, default=None,
+                            help="Pages passées à l'OCR en parallèle dans chaque processus")
+
     def handle(self, *args, **options):
-        cv_folder = r"C:\Users\HP\Downloads\cvs"
+        cv_folder = options["path"]
         
         if not os.path.exists(cv_folder):
             self.stdout.write(self.style.ERROR(f"Dossier introuvable: {cv_folder}"))
             return
 
-        for filename in [f for f in os.listdir(cv_folder) if f.endswith(".pdf")]:
-            pdf_path = os.path.join(cv_folder, filename)
-            self.stdout.write(f"\n🔍 Traitement de {filename}...")
+        files = self.list_files(cv_folder)
+        manifest = {
+            entry.chemin: entry
+            for entry in CVManifest.objects.filter(chemin__startswith=os.path.join(cv_folder, ""))
+        }
+        todo = [f for f in files if self.needs_processing(manifest.get(f[0]), f, options["retry_failed"])]
+
+        stats = {"fichiers": 0, "inchanges": len(files) - len(todo), "cache": 0,
+                 "enregistres": 0, "ignores": 0, "erreurs": 0}
+        timings = {"extraction": 0.0, "parsing": 0.0, "enregistrement": 0.0}
+        batch = []
+        start = time.perf_counter()
+
+        for result in self.iter_results(todo, manifest, options):
+            if result["inchange"]:
+                stats["inchanges"] += 1
+                batch.append(result)
+                continue
+
+            stats["fichiers"] += 1
+            stats["cache"] += result["cached"]
+            for stage, elapsed in result["timings"].items():
+                timings[stage] += elapsed
+
+            self.stdout.write(f"\n🔍 Traitement de {os.path.basename(result['path'])}...")
+            if result["messages"]:
+                self.stdout.write(result["messages"].rstrip())
+
+            if result["error"]:
+                stats["erreurs"] += 1
+                self.stdout.write(self.style.ERROR(f"Erreur: {result['error']}"))
+            elif not result["data"]:
+                stats["ignores"] += 1
+            batch.append(result)
+
+            if len(batch) >= options["batch_size"]:
+                stats["enregistres"] += self.save_batch(batch, timings)
+                batch = []
+
+        stats["enregistres"] += self.save_batch(batch, timings)
+        self.print_summary(stats, timings, time.perf_counter() - start)
+
+    def list_files(self, cv_folder):
+        """PDF du dossier avec taille et date de modification"""
+        files = []
+        for entry in sorted(os.scandir(cv_folder), key=lambda e: e.name):
+            if entry.is_file() and entry.name.lower().endswith(".pdf"):
+                stat = entry.stat()
+                files.append((entry.path, stat.st_size, stat.st_mtime))
+        return files
+
+    def needs_processing(self, entry, fichier, retry_failed):
+        """Un fichier déjà traité et inchangé (taille, mtime) n'est pas relu"""
+        if entry is None:
+            return True
+        if entry.statut == CVManifest.ECHEC:
+            return retry_failed
+        _, taille, mtime = fichier
+        return entry.taille != taille or entry.mtime != mtime
+
+    def iter_results(self, files, manifest, options):
+        """Extraction en parallèle, les résultats reviennent au processus principal (seul écrivain)"""
+        if options["workers"] <= 1:
+            yield from self.iter_batches(files, manifest, map, options)
+            return
+
+        # Les processus fils ne doivent pas hériter des connexions ouvertes
+        connections.close_all()
+        chunksize = max(1, options["chunk_size"])
+        # spawn : pas de copie de l'état du processus principal (threads, verrous),
+        # chaque fils initialise Django avant de recevoir ses tâches
+        executor = ProcessPoolExecutor(
+            max_workers=options["workers"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        )
+        with executor:
+            yield from self.iter_batches(
+                files, manifest, lambda fn, items: executor.map(fn, items, chunksize=chunksize), options
+            )
+
+    def iter_batches(self, files, manifest, map_fn, options):
+        """Empreintes SHA-256, puis manifeste et cache consultés avant extraction"""
+        batch_size = max(1, options["batch_size"])
+        # Sans réglage explicite, CV_OCR_WORKERS pages par processus dans la limite des cœurs
+        ocr_workers = options["ocr_threads"] or max(1, min(
+            settings.CV_OCR_WORKERS,
+            (os.cpu_count() or 1) // (max(1, options["workers"]) * settings.CV_OCR_THREADS),
+        ))
+        for i in range(0, len(files), batch_size):
+            chunk = files[i:i + batch_size]
+            hashes = list(map_fn(cv_cache.file_sha256, [path for path, _, _ in chunk]))
+            cached = cv_cache.get_many(hashes)
+            tasks, stats = [], {}
+
+            for (path, taille, mtime), sha256 in zip(chunk, hashes):
+                stats[path] = (taille, mtime)
+                entry = manifest.get(path)
+                # Fichier touché mais contenu identique : seul le manifeste est mis à jour
+                if entry and entry.sha256 == sha256 and entry.statut != CVManifest.ECHEC:
+                    yield {"path": path, "taille": taille, "mtime": mtime, "sha256": sha256,
+                           "inchange": True, "statut": entry.statut, "erreur": entry.erreur}
+                    continue
+                cached_entry = cached.get(sha256)
+                tasks.append((path, sha256, (cached_entry.texte, cached_entry.ocr) if cached_entry else None,
+                              ocr_workers))
+
+            for result in map_fn(analyse_file, tasks):
+                result["taille"], result["mtime"] = stats[result["path"]]
+                yield result
+
+    def save_batch(self, batch, timings):
+        """Enregistrement d'un lot dans une seule transaction, manifeste compris
+
+        Un arrêt brutal perd au plus le lot en cours : ses fichiers, absents du
+        manifeste, seront retraités à la prochaine exécution.
+        """
+        if not batch:
+            return 0
 
+        start = time.perf_counter()
+        cache_entries, manifest_rows = [], []
+        with span("enregistrement", cv=len(batch)), transaction.atomic():
+            statuts = self.save_consultants([r["data"] for r in batch if not r["inchange"] and not r["error"] and r["data"]])
+
+            for result in batch:
+                cv_data = result.get("data")
+                if result["inchange"]:
+                    statut, erreur = result["statut"], result["erreur"]
+                elif result["error"]:
+                    statut, erreur = CVManifest.ECHEC, result["error"]
+                elif cv_data:
+                    erreur = statuts[cv_data["email"]]
+                    statut = CVManifest.ECHEC if erreur else CVManifest.TERMINE
+                else:
+                    statut, erreur = CVManifest.IGNORE, None
+
+                manifest_rows.append(CVManifest(
+                    chemin=result["path"], taille=result["taille"], mtime=result["mtime"],
+                    sha256=result["sha256"], statut=statut, erreur=erreur,
+                ))
+                if result.get("texte") is not None:
+                    cache_entries.append((
+                        result["sha256"], result["texte"], result["ocr"],
+                        {cv_cache.MOTS_CLES: cv_data["competences"]} if cv_data else {},
+                    ))
+
+            CVManifest.objects.bulk_create(
+                manifest_rows,
+                update_conflicts=True,
+                unique_fields=["chemin"],
+                update_fields=["taille", "mtime", "sha256", "statut", "erreur", "updated_at"],
+            )
+        cv_cache.put_many(cache_entries)
+        timings["enregistrement"] += time.perf_counter() - start
+        return sum(1 for erreur in statuts.values() if erreur is None)
+
+    def save_consultants(self, batch):
+        """Enregistrement groupé ; en cas d'erreur, reprise ligne par ligne pour isoler le CV fautif
+
+        Retourne {email: None si enregistré, sinon message d'erreur}.
+        """
+        if not batch:
+            return {}
+
+        try:
+            with transaction.atomic():
+                consultants, created = bulk_upsert_consultants([self.consultant_fields(d) for d in batch])
+                bulk_add_competences(
+                    {consultants[d["email"]].id: d["competences"] for d in batch}, niveau=2
+                )
+                index_cv_texts({
+                    consultants[d["email"]].id: (d["sha256"], d["texte"]) for d in batch if d.get("texte")
+                })
+            for data in batch:
+                self.stdout.write(self.style.SUCCESS(
+                    f"{'Créé' if data['email'] in created else 'Mis à jour'} : {data['prenom']} {data['nom']}"
+                ))
+            return {data["email"]: None for data in batch}
+        except Exception as e:
+            logger.warning("Enregistrement groupé impossible, reprise ligne par ligne : %s", e)
+
+        statuts = {}
+        for data in batch:
             try:
-                cv_data = self.process_pdf(pdf_path)
-                if cv_data:
-                    self.save_consultant(cv_data)
+                with transaction.atomic():
+                    self.save_consultant(data)
+                statuts[data["email"]] = None
             except Exception as e:
-                self.stdout.write(self.style.ERROR(f"Erreur: {str(e)}"))
+                self.stdout.write(self.style.ERROR(f"Erreur DB: {str(e)}"))
+                statuts[data["email"]] = f"Erreur DB: {e}"
+        return statuts
 
-    def process_pdf(self, path):
-        """Traitement principal du PDF"""
-        doc = fitz.open(path)
-        text = self.extract_text(doc)
-        
-        if not text:
-            self.stdout.write("Aucun texte détecté - Vérifier le format du PDF")
-            return None
+    def consultant_fields(self, data):
+        return {
+            "email": data["email"],
+            "nom": data["nom"],
+            "prenom": data["prenom"],
+            "telephone": data["telephone"],
+            "ville": data["ville"],
+            "pays": data["pays"],
+            "date_debut_dispo": parse_date("2024-01-01"),
+            "date_fin_dispo": parse_date("2024-12-31"),
+        }
 
-        return self.parse_cv_data(text)
+    def print_summary(self, stats, timings, elapsed):
+        debit = stats["fichiers"] / elapsed if elapsed else 0.0
+        self.stdout.write(self.style.SUCCESS(
+            f"\n{stats['fichiers']} fichier(s) en {elapsed:.1f}s ({debit:.2f} fichiers/s) : "
+            f"{stats['enregistres']} enregistré(s), {stats['ignores']} ignoré(s), "
+            f"{stats['erreurs']} erreur(s), {stats['cache']} depuis le cache, "
+            f"{stats['inchanges']} inchangé(s)"
+        ))
+        for stage, total in timings.items():
+            moyenne = total / stats["fichiers"] if stats["fichiers"] else 0.0
+            self.stdout.write(f"  {stage:<15} {total:8.2f}s cumulés  {moyenne * 1000:8.1f} ms/fichier")
 
-    def extract_text(self, doc):
-        """Extraction du texte avec OCR amélioré"""
-        text = "\n".join(page.get_text("text") for page in doc)
-        
-        if not text.strip() and OCR_AVAILABLE:
-            self.stdout.write("Utilisation de l'OCR...")
-            text = self.ocr_processing(doc)
-        
-        return self.clean_text(text)
-
-    def ocr_processing(self, doc):
-        """Traitement OCR avancé"""
-        full_text = ""
-        for page in doc:
-            pix = page.get_pixmap(dpi=300)
-            img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-            
-            # Prétraitement d'image
-            img = img.convert("L")
-            img = ImageEnhance.Contrast(img).enhance(3.0)
-            img = ImageEnhance.Sharpness(img).enhance(2.0)
-            
-            # Configuration Tesseract
-            config = (
-                "-l fra+ara+eng --oem 3 --psm 6 "
-                "-c tessedit_char_whitelist=abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789@.-_àéèêëïîôùûçâäÀÉÈÊËÏÎÔÙÛÇÂÄ"
-            )
-            
-            text = pytesseract.image_to_string(img, config=config)
-            full_text += text + "\n"
-        
-        return full_text
+    def extract_text_and_ocr_flag(self, doc, ocr_workers=None):
+        """Texte nettoyé et indicateur d'utilisation de l'OCR (pages scannées uniquement)"""
+        if not OCR_AVAILABLE:
+            return self.clean_text("\n".join(page.get_text("text") for page in doc)), False
+
+        text, ocr_count = extract_text(doc, max_workers=ocr_workers)
+        if ocr_count:
+            self.stdout.write(f"Utilisation de l'OCR ({ocr_count}/{len(doc)} page(s))...")
+        return text, ocr_count > 0
 
     def clean_text(self, text):
         """Nettoyage du texte pour l'analyse"""
-        replacements = [
-            (r"\s+", " "),
-            (r"\s?[@\.]\s?", lambda m: m.group().strip()),
-            (r"ﬁ", "fi"),
-            (r"ﬂ", "fl"),
-        ]
-        
-        for pattern, replacement in replacements:
-            text = re.sub(pattern, replacement, text)
-            
-        return text.strip()
+        return clean_text(text)
 
     def parse_cv_data(self, text):
         """Extraction des données CV"""
@@ -198,50 +410,22 @@ class Command(BaseCommand):
 
     def extract_location(self, text):
         """Détection de la localisation"""
-        for city, country in CITY_COUNTRY_MAP.items():
-            if re.search(rf"\b{re.escape(city)}\b", text, re.IGNORECASE):
-                return city, country
-        return ("Non spécifié", "Mauritanie")
+        return get_taxonomy().find_location(text) or ("Non spécifié", "Mauritanie")
 
     def extract_skills(self, text):
         """Détection des compétences"""
-        skills = [
-            "Python", "Django", "Flask", "Java", "JavaScript",
-            "React", "Angular", "PHP", "Laravel", "SQL",
-            "PostgreSQL", "MongoDB", "Docker", "Git", "AWS",
-            "Machine Learning", "Data Analysis", "Power BI",
-        ]
-        return [skill for skill in skills if re.search(rf"\b{skill}\b", text, re.IGNORECASE)]
+        return get_taxonomy().competences.find_all(text)
 
     def save_consultant(self, data):
         """Sauvegarde en base de données"""
-        try:
-            with transaction.atomic():
-                consultant, created = Consultant.objects.update_or_create(
-                    email=data["email"],
-                    defaults={
-                        "nom": data["nom"],
-                        "prenom": data["prenom"],
-                        "telephone": data["telephone"],
-                        "ville": data["ville"],
-                        "pays": data["pays"],
-                        "date_debut_dispo": parse_date("2024-01-01"),
-                        "date_fin_dispo": parse_date("2024-12-31"),
-                    },
-                )
+        consultants, created = bulk_upsert_consultants([self.consultant_fields(data)])
+        bulk_add_competences({consultants[data["email"]].id: data["competences"]}, niveau=2)
+        if data.get("texte"):
+            index_cv_texts({consultants[data["email"]].id: (data["sha256"], data["texte"])})
 
-                for competence in data["competences"]:
-                    Competence.objects.get_or_create(
-                        consultant=consultant,
-                        nom_competence=competence,
-                        defaults={"niveau": 2},
-                    )
-
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"{'Créé' if created else 'Mis à jour'} : "
-                        f"{data['prenom']} {data['nom']}"
-                    )
-                )
-        except Exception as e:
-            self.stdout.write(self.style.ERROR(f"Erreur DB: {str(e)}"))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"{'Créé' if created else 'Mis à jour'} : "
+                f"{data['prenom']} {data['nom']}"
+            )
+        )
@@ -0,0 +1,52 @@
+import json
+import os
+from django.core.management.base import BaseCommand
+from consultants.benchmark import generate_corpus, run_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure des étapes du pipeline d'extraction sur un corpus de CV synthétiques "
+        "(texte, scans, multipages, FR/AR/EN), résultats en JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--corpus", default=os.path.join("bench", "corpus"),
+                            help="Dossier du corpus (généré s'il est vide)")
+        parser.add_argument("--count", type=int, default=40, help="Nombre de CV à générer")
+        parser.add_argument("--seed", type=int, default=42, help="Graine du générateur")
+        parser.add_argument("--regenerate", action="store_true", help="Régénère le corpus")
+        parser.add_argument("--output", default=None,
+                            help="Fichier JSON des résultats (défaut : bench/results-<commit>.json)")
+        parser.add_argument("--skip-ocr", action="store_true")
+        parser.add_argument("--skip-nlp", action="store_true")
+        parser.add_argument("--skip-db", action="store_true")
+
+    def handle(self, *args, **options):
+        corpus_dir = options["corpus"]
+        existing = os.path.isdir(corpus_dir) and any(f.endswith(".pdf") for f in os.listdir(corpus_dir))
+        if options["regenerate"] or not existing:
+            self.stdout.write(f"Génération de {options['count']} CV dans {corpus_dir} (graine {options['seed']})...")
+            generate_corpus(corpus_dir, options["count"], options["seed"])
+
+        results = run_benchmark(
+            corpus_dir,
+            use_ocr=not options["skip_ocr"],
+            use_nlp=not options["skip_nlp"],
+            use_db=not options["skip_db"],
+        )
+
+        output = options["output"] or os.path.join("bench", f"results-{results['commit'] or 'local'}.json")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+
+        self.stdout.write(f"\n{results['documents']} CV, commit {results['commit']}")
+        for stage, stats in results["etapes"].items():
+            self.stdout.write(
+                f"  {stage:<18} n={stats['n']:<5} moy {stats['mean_ms']:9.1f} ms  "
+                f"p95 {stats['p95_ms']:9.1f} ms  total {stats['total_s']:8.2f}s"
+            )
+        for raison in results["ignore"]:
+            self.stdout.write(self.style.WARNING(f"  ignoré : {raison}"))
+        self.stdout.write(self.style.SUCCESS(f"Résultats : {output}"))
@@ -0,0 +1,46 @@
+import json
+import os
+from django.core.management.base import BaseCommand
+from consultants.benchmark import run_staffing_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "Mesure des requêtes de disponibilité et de conflits sur un planning synthétique "
+        "(créé puis annulé dans une transaction), résultats en JSON"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--consultants", type=int, default=20000)
+        parser.add_argument("--missions", type=int, default=5000)
+        parser.add_argument("--participations", type=int, default=40000)
+        parser.add_argument("--queries", type=int, default=20, help="Nombre de périodes interrogées")
+        parser.add_argument("--seed", type=int, default=42, help="Graine du générateur")
+        parser.add_argument("--output", default=None,
+                            help="Fichier JSON des résultats (défaut : bench/staffing-<commit>.json)")
+
+    def handle(self, *args, **options):
+        results = run_staffing_benchmark(
+            consultants=options["consultants"],
+            missions=options["missions"],
+            participations=options["participations"],
+            queries=options["queries"],
+            seed=options["seed"],
+        )
+
+        output = options["output"] or os.path.join("bench", f"staffing-{results['commit'] or 'local'}.json")
+        os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+        with open(output, "w", encoding="utf-8") as f:
+            json.dump(results, f, ensure_ascii=False, indent=2, default=str)
+
+        planning = results["planning"]
+        self.stdout.write(
+            f"\n{planning['consultants']} consultants, {planning['missions']} missions, "
+            f"{planning['participations']} affectations, commit {results['commit']}"
+        )
+        for stage, stats in results["etapes"].items():
+            self.stdout.write(
+                f"  {stage:<18} n={stats['n']:<5} moy {stats['mean_ms']:9.1f} ms  "
+                f"p95 {stats['p95_ms']:9.1f} ms  total {stats['total_s']:8.2f}s"
+            )
+        self.stdout.write(self.style.SUCCESS(f"Résultats : {output}"))
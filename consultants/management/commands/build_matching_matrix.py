@@ -0,0 +1,27 @@
+import time
+from django.core.management.base import BaseCommand
+from consultants.matching import matrix_path, rebuild_matrix, refresh_matrix
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcule la matrice consultants x compétences du classement des appels d'offres ; "
+        "--incremental intègre seulement les derniers changements (à planifier, par exemple en cron)"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--incremental", action="store_true",
+                            help="Rejoue les changements en attente au lieu d'un recalcul complet")
+
+    def handle(self, *args, **options):
+        start = time.perf_counter()
+        if options["incremental"]:
+            matrix, changes = refresh_matrix()
+            self.stdout.write(f"{changes} changement(s) intégré(s)")
+        else:
+            matrix = rebuild_matrix()
+        consultants, competences = matrix.weights.shape
+        self.stdout.write(self.style.SUCCESS(
+            f"{consultants} consultant(s) x {competences} compétence(s), {matrix.weights.nnz} lien(s) "
+            f"en {time.perf_counter() - start:.2f}s : {matrix_path()}"
+        ))
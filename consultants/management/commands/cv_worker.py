@@ -0,0 +1,125 @@
+import multiprocessing
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor, wait
+from datetime import timedelta
+import django
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connections
+from consultants import nlp
+from consultants.jobs import claim_next_job, run_job, requeue_stale_jobs
+from consultants.models import CVJob
+
+
+def max_rss_mb():
+    # ru_maxrss est exprimé en Ko sous Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def run_worker(options):
+    """Boucle d'un processus worker lancé par spawn : le modèle est chargé dans ce processus"""
+    command = Command()
+    command.preload(options, shared=False)
+    command.run_loop(options)
+
+
+class Command(BaseCommand):
+    help = "Worker de la file d'attente des CV (extraction des compétences hors requête web)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sleep", type=float, default=2.0,
+                            help="Attente (secondes) quand la file est vide")
+        parser.add_argument("--once", action="store_true",
+                            help="Vide la file d'attente puis s'arrête")
+        parser.add_argument("--stale-minutes", type=int, default=30,
+                            help="Relance les jobs EN_COURS depuis plus de N minutes")
+        parser.add_argument("--processes", type=int, default=1,
+                            help="Nombre de processus workers (fork après chargement du modèle)")
+        parser.add_argument("--no-preload", action="store_true",
+                            help="Charge le modèle spaCy au premier CV plutôt qu'au démarrage")
+
+    def handle(self, *args, **options):
+        relances = requeue_stale_jobs(timedelta(minutes=options["stale_minutes"]))
+        if relances:
+            self.stdout.write(self.style.WARNING(f"{relances} job(s) bloqué(s) remis en attente"))
+
+        if options["processes"] <= 1:
+            self.preload(options, shared=False)
+            self.run_loop(options)
+            return
+
+        if "fork" in multiprocessing.get_all_start_methods():
+            self.run_forked(options)
+        else:
+            self.run_spawned(options)
+
+    def run_forked(self, options):
+        """Modèle chargé une fois dans le parent puis partagé en copie sur écriture par les fils"""
+        self.preload(options, shared=True)
+        # Les fils partagent le modèle, pas les connexions
+        connections.close_all()
+        context = multiprocessing.get_context("fork")
+        processes = [
+            context.Process(target=self.run_loop, args=(options,), daemon=True)
+            for _ in range(options["processes"])
+        ]
+        for process in processes:
+            process.start()
+        try:
+            for process in processes:
+                process.join()
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt des workers")
+
+    def run_spawned(self, options):
+        """Sans fork (Windows) : chaque fils initialise Django puis charge son propre modèle"""
+        connections.close_all()
+        options = {key: value for key, value in options.items() if key not in ("stdout", "stderr")}
+        with ProcessPoolExecutor(
+            max_workers=options["processes"],
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=django.setup,
+        ) as executor:
+            futures = [executor.submit(run_worker, options) for _ in range(options["processes"])]
+            try:
+                wait(futures)
+            except KeyboardInterrupt:
+                self.stdout.write("Arrêt des workers")
+            for future in futures:
+                if not future.cancelled() and future.done() and future.exception():
+                    self.stdout.write(self.style.ERROR(f"Worker arrêté : {future.exception()}"))
+
+    def preload(self, options, shared):
+        if options["no_preload"]:
+            return
+        start = time.perf_counter()
+        nlp.preload(freeze=shared)
+        self.stdout.write(
+            f"Modèle NLP chargé en {time.perf_counter() - start:.2f}s (RSS max {max_rss_mb():.0f} Mo)"
+        )
+
+    def run_loop(self, options):
+        self.stdout.write("Worker CV démarré")
+        try:
+            while True:
+                close_old_connections()
+                job = claim_next_job()
+
+                if job is None:
+                    if options["once"]:
+                        break
+                    time.sleep(options["sleep"])
+                    continue
+
+                self.stdout.write(f"🔍 Job #{job.pk} : {job.fichier}")
+                job = run_job(job)
+
+                if job.statut == CVJob.TERMINE:
+                    self.stdout.write(self.style.SUCCESS(
+                        f"Job #{job.pk} terminé : {len(job.competences)} compétence(s) "
+                        f"(RSS max {max_rss_mb():.0f} Mo)"
+                    ))
+                else:
+                    self.stdout.write(self.style.ERROR(f"Job #{job.pk} {job.statut} : {job.erreur}"))
+        except KeyboardInterrupt:
+            self.stdout.write("Arrêt du worker")
@@ -0,0 +1,28 @@
+import sys
+from django.core.management.base import BaseCommand
+from consultants.export import CHUNK_SIZE, FORMATS, export_consultants
+
+
+class Command(BaseCommand):
+    help = "Exporte tous les consultants et leurs compétences (CSV ou NDJSON, gzip possible), mémoire constante"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=sorted(FORMATS), default="csv")
+        parser.add_argument("--gzip", action="store_true")
+        parser.add_argument("--output", default="-", help="Fichier de sortie (défaut : sortie standard)")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        blocks = export_consultants(options["format"], options["gzip"], options["chunk_size"])
+        if options["output"] == "-":
+            out = sys.stdout.buffer
+            for block in blocks:
+                out.write(block)
+            out.flush()
+            return
+
+        with open(options["output"], "wb") as f:
+            total = 0
+            for block in blocks:
+                total += f.write(block)
+        self.stderr.write(self.style.SUCCESS(f"{options['output']} : {total} octets"))
@@ -0,0 +1,39 @@
+import json
+from django.core.management.base import BaseCommand, CommandError
+from consultants.bulk import BATCH_SIZE
+from consultants.importer import import_consultants, read_rows
+
+
+class Command(BaseCommand):
+    help = (
+        "Importe des consultants depuis un CSV ou un classeur Excel (.xlsx) : upsert par email, "
+        "compétences « nom:niveau;nom », comptes sans mot de passe"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("fichier")
+        parser.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+        parser.add_argument("--report", default=None, help="Fichier JSON du rapport (erreurs détaillées)")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options["fichier"], "rb") as f:
+                report = import_consultants(read_rows(f, options["fichier"]), options["batch_size"])
+        except (OSError, ValueError, ImportError) as e:
+            raise CommandError(str(e))
+
+        if options["report"]:
+            with open(options["report"], "w", encoding="utf-8") as f:
+                json.dump(report, f, ensure_ascii=False, indent=2, default=str)
+
+        for detail in report["details"][:20]:
+            self.stdout.write(self.style.ERROR(f"Ligne {detail['ligne']} ({detail['email']}) : {detail['erreurs']}"))
+        self.stdout.write(self.style.SUCCESS(
+            f"{report['lignes']} ligne(s) en {report['duree_s']}s ({report['lignes_par_s']} lignes/s) : "
+            f"{report['crees']} créé(s), {report['existants']} existant(s) mis à jour, "
+            f"{report['competences']} compétence(s) ajoutée(s), {report['erreurs']} erreur(s)"
+        ))
+        if report["interruption"]:
+            raise CommandError(
+                f"Lecture interrompue ligne {report['interruption']['ligne']} : {report['interruption']['erreur']}"
+            )
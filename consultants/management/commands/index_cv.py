@@ -0,0 +1,45 @@
+from django.core.files.storage import default_storage
+from django.core.management.base import BaseCommand
+from consultants import cv_cache
+from consultants.extraction import extract_text, open_pdf
+from consultants.fulltext import index_cv_texts
+from consultants.models import Consultant
+
+
+class Command(BaseCommand):
+    help = "Indexe en plein texte les CV des consultants déjà inscrits (texte repris du cache si possible)"
+
+    def add_arguments(self, parser):
+        parser.add_argument("--all", action="store_true",
+                            help="Réindexe aussi les consultants dont le CV est déjà indexé")
+        parser.add_argument("--batch-size", type=int, default=100)
+
+    def handle(self, *args, **options):
+        consultants = Consultant.objects.exclude(cv="").exclude(cv__isnull=True)
+        if not options["all"]:
+            consultants = consultants.filter(cv_texte__isnull=True)
+
+        batch, total, erreurs = {}, 0, 0
+        for consultant_id, fichier in consultants.order_by("id").values_list("id", "cv").iterator():
+            try:
+                with default_storage.open(fichier, "rb") as f:
+                    data = f.read()
+                sha256 = cv_cache.bytes_sha256(data)
+                cached = cv_cache.get(sha256)
+                if cached:
+                    texte = cached.texte
+                else:
+                    with open_pdf(data) as doc:
+                        texte, ocr_pages = extract_text(doc)
+                    cv_cache.put(sha256, texte, ocr_pages > 0)
+                batch[consultant_id] = (sha256, texte)
+            except Exception as e:
+                erreurs += 1
+                self.stdout.write(self.style.ERROR(f"Consultant {consultant_id} ({fichier}) : {e}"))
+
+            if len(batch) >= options["batch_size"]:
+                total += index_cv_texts(batch)
+                batch = {}
+        total += index_cv_texts(batch)
+
+        self.stdout.write(self.style.SUCCESS(f"{total} CV indexé(s), {erreurs} erreur(s)"))
@@ -0,0 +1,336 @@
+import os
+import tempfile
+import threading
+import numpy as np
+from scipy import sparse
+from django.conf import settings
+from .metrics import span
+from .models import AppelOffre, Competence, Consultant, MatchingChange, Skill
+from .taxonomy import TaxonomyMatcher
+
+# Disponibilité d'un consultant supprimé : aucune fenêtre ne peut la couvrir
+NEVER = np.iinfo(np.int32).max
+
+
+class SkillMatrix:
+    """Matrice creuse consultants x compétences et classement TF-IDF
+
+    Les poids bruts (niveau) sont stockés en CSR ; l'IDF et la norme de chaque
+    ligne sont recalculés de façon vectorisée après chaque mise à jour, si bien
+    qu'un classement se réduit à un produit matrice-vecteur et un argpartition.
+    Les consultants modifiés (MatchingChange) sont rejoués ligne par ligne ;
+    applied garde les identifiants des changements déjà intégrés.
+    """
+
+    def __init__(self, weights, consultant_ids, skill_ids, debut, fin, applied=()):
+        self.weights = sparse.csr_matrix(weights, dtype=np.float32)
+        self.consultant_ids = np.asarray(consultant_ids, dtype=np.int64)
+        self.skill_ids = np.asarray(skill_ids, dtype=np.int64)
+        self.debut = np.asarray(debut, dtype=np.int32)
+        self.fin = np.asarray(fin, dtype=np.int32)
+        self.applied = set(applied)
+        self.row_of = {int(cid): i for i, cid in enumerate(self.consultant_ids)}
+        self.col_of = {int(sid): j for j, sid in enumerate(self.skill_ids)}
+        self._matcher = None
+        self.prepare()
+
+    @property
+    def active(self):
+        return self.debut != NEVER
+
+    def prepare(self):
+        n = int(self.active.sum())
+        df = np.bincount(self.weights.indices, minlength=len(self.skill_ids))
+        self.idf = (np.log((1 + n) / (1 + df)) + 1).astype(np.float32)
+        norms = np.sqrt(self.weights.multiply(self.weights) @ (self.idf ** 2))
+        self.norms = np.where(norms > 0, norms, 1).astype(np.float32)
+
+    @classmethod
+    def build(cls):
+        """Matrice complète depuis la base"""
+        # Relevé avant lecture : ces changements sont intégrés, les suivants seront rejoués
+        applied = list(MatchingChange.objects.values_list("id", flat=True))
+        consultants = list(
+            Consultant.objects.order_by("id").values_list("id", "date_debut_dispo", "date_fin_dispo")
+        )
+        skill_ids = list(Skill.objects.order_by("id").values_list("id", flat=True))
+        row_of = {cid: i for i, (cid, _, _) in enumerate(consultants)}
+        col_of = {sid: j for j, sid in enumerate(skill_ids)}
+
+        rows, cols, data = [], [], []
+        for consultant_id, skill_id, niveau in Competence.objects.values_list(
+            "consultant_id", "skill_id", "niveau"
+        ).iterator(chunk_size=10000):
+            if consultant_id in row_of and skill_id in col_of:
+                rows.append(row_of[consultant_id])
+                cols.append(col_of[skill_id])
+                data.append(max(niveau, 1))
+
+        weights = sparse.csr_matrix((data, (rows, cols)), shape=(len(consultants), len(skill_ids)))
+        return cls(
+            weights, [c[0] for c in consultants], skill_ids,
+            [c[1].toordinal() for c in consultants], [c[2].toordinal() for c in consultants],
+            applied,
+        )
+
+    def apply_changes(self, consultant_ids):
+        """Recalcule les lignes des consultants indiqués (ajoutés, modifiés ou supprimés)"""
+        consultant_ids = set(consultant_ids)
+        dates = {
+            cid: (debut, fin)
+            for cid, debut, fin in Consultant.objects.filter(id__in=consultant_ids)
+            .values_list("id", "date_debut_dispo", "date_fin_dispo")
+        }
+        competences = list(
+            Competence.objects.filter(consultant_id__in=dates.keys())
+            .values_list("consultant_id", "skill_id", "niveau")
+        )
+
+        new_rows = sorted(cid for cid in dates if cid not in self.row_of)
+        new_cols = sorted({sid for _, sid, _ in competences if sid not in self.col_of})
+        for cid in new_rows:
+            self.row_of[cid] = len(self.row_of)
+        for sid in new_cols:
+            self.col_of[sid] = len(self.col_of)
+        if new_cols:
+            self._matcher = None
+        self.consultant_ids = np.concatenate([self.consultant_ids, np.asarray(new_rows, dtype=np.int64)])
+        self.skill_ids = np.concatenate([self.skill_ids, np.asarray(new_cols, dtype=np.int64)])
+        self.debut = np.concatenate([self.debut, np.full(len(new_rows), NEVER, dtype=np.int32)])
+        self.fin = np.concatenate([self.fin, np.full(len(new_rows), NEVER, dtype=np.int32)])
+        shape = (len(self.consultant_ids), len(self.skill_ids))
+        self.weights.resize(shape)
+
+        # Lignes modifiées remises à zéro puis remplacées par leurs nouvelles valeurs
+        changed = np.array(
+            [self.row_of[cid] for cid in consultant_ids if cid in self.row_of], dtype=np.int64
+        )
+        keep = np.ones(shape[0], dtype=np.float32)
+        keep[changed] = 0
+        delta = sparse.csr_matrix(
+            (
+                [max(niveau, 1) for _, _, niveau in competences],
+                ([self.row_of[cid] for cid, _, _ in competences], [self.col_of[sid] for _, sid, _ in competences]),
+            ),
+            shape=shape, dtype=np.float32,
+        )
+        self.weights = (sparse.diags(keep) @ self.weights + delta).tocsr()
+        self.weights.eliminate_zeros()
+
+        for cid in consultant_ids:
+            if cid not in self.row_of:
+                continue
+            debut, fin = dates.get(cid, (None, None))
+            row = self.row_of[cid]
+            self.debut[row] = debut.toordinal() if debut else NEVER
+            self.fin[row] = fin.toordinal() if fin else NEVER
+        self.prepare()
+
+    def skill_matcher(self):
+        """Recherche des compétences connues (noms et alias) dans un texte libre"""
+        if self._matcher is None:
+            matcher = TaxonomyMatcher({})
+            for sid, nom, aliases in Skill.objects.filter(id__in=self.col_of.keys()).values_list(
+                "id", "nom", "aliases"
+            ).iterator():
+                for expression in [nom, *(aliases or [])]:
+                    matcher.add(expression, sid)
+            self._matcher = matcher
+        return self._matcher
+
+    def query_vector(self, skill_weights):
+        query = np.zeros(len(self.skill_ids), dtype=np.float32)
+        for skill_id, weight in skill_weights.items():
+            col = self.col_of.get(skill_id)
+            if col is not None:
+                query[col] += weight
+        return query * self.idf
+
+    def top_k(self, skill_weights, k=20, debut=None, fin=None):
+        """[(consultant_id, score cosinus)] des k meilleurs consultants disponibles sur [debut, fin]"""
+        query = self.query_vector(skill_weights)
+        norm = np.linalg.norm(query)
+        if not norm:
+            return []
+        scores = (self.weights @ query) / (self.norms * norm)
+
+        mask = self.active & (scores > 0)
+        if debut:
+            mask &= self.debut <= debut.toordinal()
+        if fin:
+            mask &= self.fin >= fin.toordinal()
+        candidates = np.flatnonzero(mask)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        candidates = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(int(self.consultant_ids[i]), float(scores[i])) for i in candidates]
+
+    def matched_skills(self, consultant_id, skill_weights):
+        row = self.weights.getrow(self.row_of[consultant_id])
+        return [int(self.skill_ids[j]) for j in row.indices if int(self.skill_ids[j]) in skill_weights]
+
+    def save(self, path):
+        """Écriture atomique (fichier temporaire puis renommage)"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".npz")
+        with os.fdopen(fd, "wb") as f:
+            np.savez(
+                f, data=self.weights.data, indices=self.weights.indices, indptr=self.weights.indptr,
+                shape=np.asarray(self.weights.shape), consultant_ids=self.consultant_ids,
+                skill_ids=self.skill_ids, debut=self.debut, fin=self.fin,
+            )
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as f:
+            weights = sparse.csr_matrix((f["data"], f["indices"], f["indptr"]), shape=tuple(f["shape"]))
+            return cls(weights, f["consultant_ids"], f["skill_ids"], f["debut"], f["fin"])
+
+
+class MatrixNotReady(Exception):
+    """Fichier de la matrice absent : build_matching_matrix n'a pas encore tourné"""
+
+
+_matrix = None
+_matrix_mtime = None
+_lock = threading.Lock()
+
+
+def matrix_path():
+    return str(settings.MATCHING_MATRIX_PATH)
+
+
+def rebuild_matrix():
+    """Recalcul complet, enregistrement puis purge des changements intégrés"""
+    global _matrix, _matrix_mtime
+    with _lock, span("matrice_competences", mode="complet") as attrs:
+        matrix = SkillMatrix.build()
+        matrix.save(matrix_path())
+        purge_changes(matrix.applied)
+        _matrix, _matrix_mtime = matrix, os.path.getmtime(matrix_path())
+        attrs.update(consultants=matrix.weights.shape[0], competences=matrix.weights.shape[1],
+                     liens=matrix.weights.nnz)
+    return matrix
+
+
+def forget_skill_names():
+    # Noms ou alias de compétences modifiés : le dictionnaire sera relu
+    if _matrix is not None:
+        _matrix._matcher = None
+
+
+def pending_changes(matrix):
+    """Changements de la table pas encore intégrés à la matrice
+
+    Pas de seuil sur l'identifiant : une transaction validée tardivement peut
+    publier un identifiant inférieur à ceux déjà lus. La table ne contient que
+    les changements absents du fichier (refresh_matrix purge ceux qu'il
+    intègre), sa lecture complète reste donc bornée.
+    """
+    return [
+        (change_id, consultant_id)
+        for change_id, consultant_id in MatchingChange.objects.values_list("id", "consultant_id")
+        if change_id not in matrix.applied
+    ]
+
+
+def apply_pending(matrix, changes):
+    with span("matrice_competences", mode="incremental", consultants=len(changes)):
+        matrix.apply_changes(cid for _, cid in changes)
+        matrix.applied.update(change_id for change_id, _ in changes)
+
+
+def purge_changes(change_ids, batch_size=1000):
+    """Supprime les changements intégrés au fichier, et seulement ceux-là"""
+    change_ids = sorted(change_ids)
+    for i in range(0, len(change_ids), batch_size):
+        MatchingChange.objects.filter(id__in=change_ids[i:i + batch_size]).delete()
+
+
+def get_matrix():
+    """Matrice du processus, rechargée si le fichier a changé et mise à jour des derniers changements
+
+    Les changements sont rejoués en mémoire seulement : une lecture n'écrit
+    ni le fichier ni la table, seul refresh_matrix le fait. Sans fichier,
+    MatrixNotReady : le recalcul complet reste à la commande.
+    """
+    global _matrix, _matrix_mtime
+    path = matrix_path()
+    with _lock:
+        try:
+            mtime = os.path.getmtime(path)
+        except FileNotFoundError:
+            raise MatrixNotReady(path) from None
+        if _matrix is None or mtime != _matrix_mtime:
+            _matrix, _matrix_mtime = SkillMatrix.load(path), mtime
+
+        changes = pending_changes(_matrix)
+        if changes:
+            apply_pending(_matrix, changes)
+        return _matrix
+
+
+def refresh_matrix():
+    """Intègre les changements au fichier puis les purge ; retourne (matrice, changements intégrés)
+
+    À lancer périodiquement par un seul processus (build_matching_matrix
+    --incremental) : les autres rechargent le fichier à leur prochain
+    classement, la table MatchingChange reste bornée.
+    """
+    global _matrix, _matrix_mtime
+    path = matrix_path()
+    if not os.path.exists(path):
+        return rebuild_matrix(), 0
+
+    with _lock:
+        matrix = SkillMatrix.load(path)
+        changes = pending_changes(matrix)
+        if changes:
+            apply_pending(matrix, changes)
+            matrix.save(path)
+        purge_changes(matrix.applied)
+        _matrix, _matrix_mtime = matrix, os.path.getmtime(path)
+    return matrix, len(changes)
+
+
+def tender_skill_weights(appel_offre, matrix):
+    """Poids des compétences demandées par un appel d'offres
+
+    Chaque compétence citée dans la description ou les titres de mission
+    vaut 1 ; un critère d'évaluation qui la nomme ajoute son poids rapporté
+    au poids moyen des critères.
+    """
+    matcher = matrix.skill_matcher()
+    texts = [appel_offre.description, *(mission.titre for mission in appel_offre.missions.all())]
+    weights = {skill_id: 1.0 for text in texts for skill_id in matcher.find_all(text)}
+
+    criteres = list(appel_offre.criteres.all())
+    if criteres:
+        moyenne = sum(float(c.poids) for c in criteres) / len(criteres) or 1.0
+        for critere in criteres:
+            for skill_id in matcher.find_all(critere.nom_critere):
+                weights[skill_id] = weights.get(skill_id, 0.0) + float(critere.poids) / moyenne
+    return weights
+
+
+def rank_consultants(appel_offre_id, k=20, debut=None, fin=None):
+    """Classement des consultants pour un appel d'offres ; la fenêtre par défaut couvre ses missions
+
+    Retourne (appel d'offres, {skill_id: poids}, [(consultant_id, score, skill_ids communs)]).
+    """
+    appel_offre = AppelOffre.objects.prefetch_related("missions", "criteres").get(id=appel_offre_id)
+    missions = list(appel_offre.missions.all())
+    if missions and debut is None and fin is None:
+        debut = min(m.date_debut for m in missions)
+        fin = max(m.date_fin for m in missions)
+
+    matrix = get_matrix()
+    with span("classement_appel_offre", k=k) as attrs:
+        weights = tender_skill_weights(appel_offre, matrix)
+        ranking = [
+            (consultant_id, score, matrix.matched_skills(consultant_id, weights))
+            for consultant_id, score in matrix.top_k(weights, k, debut, fin)
+        ]
+        attrs.update(competences=len(weights), resultats=len(ranking))
+    return appel_offre, weights, ranking
@@ -0,0 +1,93 @@
+import cProfile
+import logging
+import re
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+
+class MetricsRegistry:
+    """Agrégats par étape (nombre, durées, compteurs numériques) pour le processus courant"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._stages = {}
+
+    def record(self, stage, elapsed_ms, error=False, **attrs):
+        with self._lock:
+            stats = self._stages.setdefault(
+                stage, {"count": 0, "errors": 0, "total_ms": 0.0, "max_ms": 0.0, "totals": {}}
+            )
+            stats["count"] += 1
+            stats["errors"] += int(error)
+            stats["total_ms"] += elapsed_ms
+            stats["max_ms"] = max(stats["max_ms"], elapsed_ms)
+            for key, value in attrs.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    stats["totals"][key] = stats["totals"].get(key, 0) + value
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                stage: {**stats, "totals": dict(stats["totals"]), "mean_ms": stats["total_ms"] / stats["count"]}
+                for stage, stats in self._stages.items()
+            }
+
+    def reset(self):
+        with self._lock:
+            self._stages.clear()
+
+
+registry = MetricsRegistry()
+
+
+@contextmanager
+def span(stage, **attrs):
+    """Mesure une étape ; les attributs ajoutés au dict renvoyé sont journalisés avec la durée"""
+    attrs = dict(attrs)
+    error = None
+    start = time.perf_counter()
+    try:
+        yield attrs
+    except Exception as e:
+        error = type(e).__name__
+        raise
+    finally:
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        registry.record(stage, elapsed_ms, error=error is not None, **attrs)
+        logger.info(
+            "%s %.1f ms %s", stage, elapsed_ms,
+            " ".join(f"{key}={value}" for key, value in attrs.items()),
+            extra={"metrics": {"stage": stage, "elapsed_ms": round(elapsed_ms, 3), "error": error, **attrs}},
+        )
+
+
+@contextmanager
+def profile_if_slow(label, threshold_ms=None):
+    """Profil cProfile conservé seulement au-delà du seuil (CV_PROFILE_THRESHOLD_MS, désactivé si None)"""
+    if threshold_ms is None:
+        threshold_ms = settings.CV_PROFILE_THRESHOLD_MS
+    if threshold_ms is None:
+        yield
+        return
+
+    profiler = cProfile.Profile()
+    start = time.perf_counter()
+    profiler.enable()
+    try:
+        yield
+    finally:
+        profiler.disable()
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if elapsed_ms >= threshold_ms:
+            directory = Path(settings.CV_PROFILE_DIR)
+            directory.mkdir(parents=True, exist_ok=True)
+            slug = re.sub(r"[^\w-]+", "_", label).strip("_")[:80]
+            path = directory / f"{datetime.now():%Y%m%d-%H%M%S}-{slug}-{int(elapsed_ms)}ms.prof"
+            profiler.dump_stats(path)
+            logger.warning("%s : %.0f ms, profil enregistré dans %s", label, elapsed_ms, path)
@@ -0,0 +1,38 @@
+import logging
+import time
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from .metrics import profile_if_slow
+
+logger = logging.getLogger(__name__)
+
+
+class SlowRequestProfilerMiddleware:
+    """Profile les requêtes plus lentes que CV_PROFILE_THRESHOLD_MS (sans effet si None)
+
+    Compatible ASGI : les vues asynchrones restent dans la boucle d'événements.
+    cProfile étant propre à un thread, il mélangerait les requêtes concurrentes
+    de la boucle : en asynchrone, seule la durée des requêtes lentes est journalisée.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        with profile_if_slow(f"{request.method} {request.path}"):
+            return self.get_response(request)
+
+    async def __acall__(self, request):
+        start = time.perf_counter()
+        response = await self.get_response(request)
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        threshold_ms = settings.CV_PROFILE_THRESHOLD_MS
+        if threshold_ms is not None and elapsed_ms >= threshold_ms:
+            logger.warning("%s %s : %.0f ms", request.method, request.path, elapsed_ms)
+        return response
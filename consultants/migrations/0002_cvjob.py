@@ -0,0 +1,36 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:37
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0001_initial'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='competence',
+            name='nom_competence',
+            field=models.CharField(max_length=1000),
+        ),
+        migrations.CreateModel(
+            name='CVJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fichier', models.CharField(max_length=255)),
+                ('statut', models.CharField(choices=[('EN_ATTENTE', 'En attente'), ('EN_COURS', 'En cours'), ('TERMINE', 'Terminé'), ('ECHEC', 'Échec')], db_index=True, default='EN_ATTENTE', max_length=20)),
+                ('progression', models.PositiveSmallIntegerField(default=0)),
+                ('etape', models.CharField(blank=True, max_length=50)),
+                ('competences', models.JSONField(blank=True, default=list)),
+                ('erreur', models.TextField(blank=True, null=True)),
+                ('tentatives', models.PositiveSmallIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('started_at', models.DateTimeField(blank=True, null=True)),
+                ('finished_at', models.DateTimeField(blank=True, null=True)),
+                ('consultant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='cv_jobs', to='consultants.consultant')),
+            ],
+        ),
+    ]
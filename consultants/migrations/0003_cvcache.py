@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0002_cvjob'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVCache',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64, unique=True)),
+                ('texte', models.TextField()),
+                ('ocr', models.BooleanField(default=False)),
+                ('competences', models.JSONField(blank=True, default=dict)),
+                ('taille', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('last_used_at', models.DateTimeField(auto_now=True, db_index=True)),
+            ],
+        ),
+    ]
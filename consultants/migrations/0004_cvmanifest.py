@@ -0,0 +1,26 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:41
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0003_cvcache'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVManifest',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('chemin', models.CharField(max_length=500, unique=True)),
+                ('taille', models.BigIntegerField()),
+                ('mtime', models.FloatField()),
+                ('sha256', models.CharField(max_length=64)),
+                ('statut', models.CharField(choices=[('TERMINE', 'Terminé'), ('IGNORE', 'Ignoré'), ('ECHEC', 'Échec')], db_index=True, max_length=20)),
+                ('erreur', models.TextField(blank=True, null=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:51
+
+from django.db import migrations, models
+
+# nom_competence (varchar 1000, utf8mb4) dépasse la taille maximale d'une clé
+# d'index MySQL : index sur les 191 premiers caractères, hors de l'état des modèles
+COMPETENCE_INDEX = "competence_nom_consultant_idx"
+
+
+def create_competence_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        columns = "nom_competence(191), consultant_id"
+    else:
+        columns = "nom_competence, consultant_id"
+    schema_editor.execute(
+        f"CREATE INDEX {COMPETENCE_INDEX} ON consultants_competence ({columns})"
+    )
+
+
+def drop_competence_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"DROP INDEX {COMPETENCE_INDEX} ON consultants_competence")
+    else:
+        schema_editor.execute(f"DROP INDEX {COMPETENCE_INDEX}")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0004_cvmanifest'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='consultant',
+            index=models.Index(fields=['pays', 'ville'], name='consultant_localite_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='consultant',
+            index=models.Index(fields=['date_debut_dispo', 'date_fin_dispo'], name='consultant_dispo_idx'),
+        ),
+        migrations.RunPython(create_competence_index, drop_competence_index),
+    ]
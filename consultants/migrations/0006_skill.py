@@ -0,0 +1,117 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+BATCH_SIZE = 1000
+
+
+def populate_skills(apps, schema_editor):
+    """Un Skill par nom normalisé, rattachement des compétences puis suppression des doublons
+
+    Pour chaque clé, le nom affiché est le nom du référentiel s'il y figure,
+    sinon la variante la plus fréquente ; les autres variantes deviennent des
+    alias. Un consultant ne garde qu'une ligne par Skill, avec le niveau le
+    plus élevé.
+    """
+    from django.db.models import Count
+    from consultants.taxonomy import get_taxonomy
+
+    Skill = apps.get_model("consultants", "Skill")
+    Competence = apps.get_model("consultants", "Competence")
+    taxonomy = get_taxonomy()
+
+    variants = {}
+    names = (
+        Competence.objects.values("nom_competence").annotate(n=Count("id")).order_by("-n", "nom_competence")
+    )
+    for row in names.iterator():
+        nom, cle, aliases = taxonomy.skill_identity(row["nom_competence"])
+        if not cle:
+            continue
+        entry = variants.setdefault(cle, {"nom": nom, "aliases": list(aliases), "noms": []})
+        entry["noms"].append(row["nom_competence"])
+        variant = " ".join(row["nom_competence"].split())
+        if variant.casefold() not in {a.casefold() for a in [entry["nom"], *entry["aliases"]]}:
+            entry["aliases"].append(variant)
+
+    Skill.objects.bulk_create(
+        [Skill(nom=e["nom"], cle=cle, aliases=e["aliases"]) for cle, e in variants.items()],
+        batch_size=BATCH_SIZE,
+    )
+    ids = dict(Skill.objects.values_list("cle", "id"))
+    for cle, entry in variants.items():
+        noms = entry["noms"]
+        for start in range(0, len(noms), BATCH_SIZE):
+            Competence.objects.filter(nom_competence__in=noms[start:start + BATCH_SIZE]).update(skill_id=ids[cle])
+
+    # Noms vides ou sans mot : rien à rattacher
+    Competence.objects.filter(skill__isnull=True).delete()
+
+    # Parcours trié : la première ligne de chaque (consultant, skill) a le niveau le plus élevé
+    doublons, previous = [], None
+    rows = Competence.objects.order_by("consultant_id", "skill_id", "-niveau", "id").values_list(
+        "id", "consultant_id", "skill_id"
+    )
+    for competence_id, consultant_id, skill_id in rows.iterator(chunk_size=BATCH_SIZE):
+        if (consultant_id, skill_id) == previous:
+            doublons.append(competence_id)
+            if len(doublons) >= BATCH_SIZE:
+                Competence.objects.filter(id__in=doublons).delete()
+                doublons = []
+        previous = (consultant_id, skill_id)
+    Competence.objects.filter(id__in=doublons).delete()
+
+
+def restore_names(apps, schema_editor):
+    Skill = apps.get_model("consultants", "Skill")
+    Competence = apps.get_model("consultants", "Competence")
+    for skill_id, nom in Skill.objects.values_list("id", "nom").iterator():
+        Competence.objects.filter(skill_id=skill_id).update(nom_competence=nom)
+
+
+# Index de recherche par nom ajouté en 0005 : remplacé par l'index (consultant, skill)
+COMPETENCE_INDEX = "competence_nom_consultant_idx"
+
+
+def drop_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        schema_editor.execute(f"DROP INDEX {COMPETENCE_INDEX} ON consultants_competence")
+    else:
+        schema_editor.execute(f"DROP INDEX {COMPETENCE_INDEX}")
+
+
+def create_name_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "mysql":
+        columns = "nom_competence(191), consultant_id"
+    else:
+        columns = "nom_competence, consultant_id"
+    schema_editor.execute(
+        f"CREATE INDEX {COMPETENCE_INDEX} ON consultants_competence ({columns})"
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0005_consultant_search_indexes'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_name_index, create_name_index),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('nom', models.CharField(max_length=255)),
+                ('cle', models.CharField(max_length=255, unique=True)),
+                ('aliases', models.JSONField(blank=True, default=list)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='competence',
+            name='skill',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='competences', to='consultants.skill'),
+        ),
+        migrations.RunPython(populate_skills, restore_names),
+    ]
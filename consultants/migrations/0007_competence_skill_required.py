@@ -0,0 +1,38 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:10
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0006_skill'),
+    ]
+
+    operations = [
+        # Valeur par défaut pour que la colonne puisse être recréée en cas de retour arrière
+        migrations.AlterField(
+            model_name='competence',
+            name='nom_competence',
+            field=models.CharField(default='', max_length=1000),
+        ),
+        migrations.RemoveField(
+            model_name='competence',
+            name='nom_competence',
+        ),
+        migrations.AlterField(
+            model_name='competence',
+            name='skill',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='competences', to='consultants.skill'),
+        ),
+        migrations.AddConstraint(
+            model_name='competence',
+            constraint=models.UniqueConstraint(fields=('consultant', 'skill'), name='competence_consultant_skill_uniq'),
+        ),
+        migrations.AddField(
+            model_name='consultant',
+            name='skills',
+            field=models.ManyToManyField(related_name='consultants', through='consultants.Competence', to='consultants.skill'),
+        ),
+    ]
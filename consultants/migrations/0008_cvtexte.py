@@ -0,0 +1,67 @@
+# Generated by Django 5.1.7 on 2026-10-18 04:55
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Index plein texte natif de chaque moteur : FULLTEXT InnoDB sous MySQL,
+# table FTS5 synchronisée par triggers sous SQLite. Une reconstruction de la
+# table par le schema editor SQLite supprime les triggers : à recréer alors.
+SQLITE_FORWARD = [
+    """CREATE VIRTUAL TABLE consultants_cvtexte_fts USING fts5(
+        texte, content='consultants_cvtexte', content_rowid='id',
+        tokenize='unicode61 remove_diacritics 2'
+    )""",
+    """CREATE TRIGGER consultants_cvtexte_ai AFTER INSERT ON consultants_cvtexte BEGIN
+        INSERT INTO consultants_cvtexte_fts(rowid, texte) VALUES (new.id, new.texte);
+    END""",
+    """CREATE TRIGGER consultants_cvtexte_ad AFTER DELETE ON consultants_cvtexte BEGIN
+        INSERT INTO consultants_cvtexte_fts(consultants_cvtexte_fts, rowid, texte) VALUES ('delete', old.id, old.texte);
+    END""",
+    """CREATE TRIGGER consultants_cvtexte_au AFTER UPDATE ON consultants_cvtexte BEGIN
+        INSERT INTO consultants_cvtexte_fts(consultants_cvtexte_fts, rowid, texte) VALUES ('delete', old.id, old.texte);
+        INSERT INTO consultants_cvtexte_fts(rowid, texte) VALUES (new.id, new.texte);
+    END""",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS consultants_cvtexte_ai",
+    "DROP TRIGGER IF EXISTS consultants_cvtexte_ad",
+    "DROP TRIGGER IF EXISTS consultants_cvtexte_au",
+    "DROP TABLE IF EXISTS consultants_cvtexte_fts",
+]
+MYSQL_FORWARD = ["ALTER TABLE consultants_cvtexte ADD FULLTEXT INDEX cvtexte_texte_ft (texte)"]
+MYSQL_REVERSE = ["ALTER TABLE consultants_cvtexte DROP INDEX cvtexte_texte_ft"]
+
+
+def create_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"mysql": MYSQL_FORWARD, "sqlite": SQLITE_FORWARD}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+def drop_fulltext_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    statements = {"mysql": MYSQL_REVERSE, "sqlite": SQLITE_REVERSE}.get(vendor, [])
+    for sql in statements:
+        schema_editor.execute(sql)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0007_competence_skill_required'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CVTexte',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('sha256', models.CharField(max_length=64)),
+                ('texte', models.TextField()),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('consultant', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='cv_texte', to='consultants.consultant')),
+            ],
+        ),
+        migrations.RunPython(create_fulltext_index, drop_fulltext_index),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:06
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0009_matchingchange'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='mission',
+            index=models.Index(fields=['date_debut', 'date_fin'], name='mission_dates_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='participationmission',
+            index=models.Index(fields=['consultant', 'mission'], name='participation_consultant_idx'),
+        ),
+    ]
@@ -0,0 +1,25 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:20
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0010_staffing_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='consultant',
+            name='revision',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddField(
+            model_name='consultant',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
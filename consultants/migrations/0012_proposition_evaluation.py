@@ -0,0 +1,49 @@
+# Generated by Django 5.1.7 on 2026-10-18 05:22
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0011_consultant_revision'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Proposition',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date_soumission', models.DateField()),
+                ('montant_propose_usd', models.DecimalField(decimal_places=2, max_digits=15)),
+                ('statut', models.CharField(choices=[('EN ATTENTE', 'En attente'), ('ACCEPTEE', 'Acceptée'), ('REJETEE', 'Rejetée')], default='EN ATTENTE', max_length=50)),
+                ('score_final', models.DecimalField(blank=True, decimal_places=2, help_text='Score total sur 100', max_digits=5, null=True)),
+                ('rang', models.PositiveIntegerField(blank=True, null=True)),
+                ('appel_offre', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='propositions', to='consultants.appeloffre')),
+                ('consultant', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='propositions', to='consultants.consultant')),
+            ],
+        ),
+        migrations.CreateModel(
+            name='Evaluation',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('note', models.DecimalField(decimal_places=2, help_text='Note sur 100', max_digits=5)),
+                ('commentaire', models.TextField(blank=True, null=True)),
+                ('critere', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluations', to='consultants.criteresevaluation')),
+                ('proposition', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='evaluations', to='consultants.proposition')),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='proposition',
+            index=models.Index(fields=['appel_offre', 'rang'], name='proposition_classement_idx'),
+        ),
+        migrations.AddConstraint(
+            model_name='proposition',
+            constraint=models.UniqueConstraint(fields=('appel_offre', 'consultant'), name='proposition_appel_offre_consultant_uniq'),
+        ),
+        migrations.AddConstraint(
+            model_name='evaluation',
+            constraint=models.UniqueConstraint(fields=('proposition', 'critere'), name='evaluation_proposition_critere_uniq'),
+        ),
+    ]
@@ -0,0 +1,22 @@
+from django.db import migrations
+
+
+def drop_vue_alias(apps, schema_editor):
+    """« vue » n'est plus un alias de Vue.js : mot courant en français (« en vue de »)"""
+    Skill = apps.get_model("consultants", "Skill")
+    for skill in Skill.objects.filter(nom__iexact="Vue.js"):
+        aliases = [alias for alias in skill.aliases or [] if alias.strip().casefold() != "vue"]
+        if aliases != skill.aliases:
+            skill.aliases = aliases
+            skill.save(update_fields=["aliases"])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('consultants', '0012_proposition_evaluation'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_vue_alias, migrations.RunPython.noop),
+    ]
@@ -28,20 +28,132 @@ class Consultant(models.Model):
     date_fin_dispo = models.DateField()
     cv = models.FileField(upload_to="cv/", null=True, blank=True)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Version de la fiche (ETag / Last-Modified), incrémentée par consultants.changes
+    updated_at = models.DateTimeField(auto_now=True)
+    revision = models.PositiveIntegerField(default=0)
+    skills = models.ManyToManyField("Skill", through="Competence", related_name="consultants")
+
+    class Meta:
+        # Recherche par localité et par fenêtre de disponibilité (voir consultants.search)
+        indexes = [
+            models.Index(fields=["pays", "ville"], name="consultant_localite_idx"),
+            models.Index(fields=["date_debut_dispo", "date_fin_dispo"], name="consultant_dispo_idx"),
+        ]
 
     def __str__(self):
         return f"{self.nom} {self.prenom}"
 
 
-# Compétences
+# Référentiel des compétences : un nom canonique, ses variantes connues
+class Skill(models.Model):
+    nom = models.CharField(max_length=255)
+    # Nom normalisé (voir taxonomy.skill_key) : "Python ", "python" et "Pythons" partagent la même clé
+    cle = models.CharField(max_length=255, unique=True)
+    aliases = models.JSONField(default=list, blank=True)
+
+    def __str__(self):
+        return self.nom
+
+
+# Compétences d'un consultant (table de liaison Consultant <-> Skill)
 class Competence(models.Model):
     consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name="competences")
-    nom_competence = models.CharField(max_length=1000)
+    skill = models.ForeignKey(Skill, on_delete=models.CASCADE, related_name="competences")
     niveau = models.IntegerField()
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["consultant", "skill"], name="competence_consultant_skill_uniq"),
+        ]
+
+    @property
+    def nom_competence(self):
+        return self.skill.nom
+
     def __str__(self):
         return f"{self.nom_competence} ({self.niveau})"
 
+# File d'attente des traitements de CV (exécutée par la commande cv_worker)
+class CVJob(models.Model):
+    EN_ATTENTE = 'EN_ATTENTE'
+    EN_COURS = 'EN_COURS'
+    TERMINE = 'TERMINE'
+    ECHEC = 'ECHEC'
+    STATUTS = (
+        (EN_ATTENTE, 'En attente'),
+        (EN_COURS, 'En cours'),
+        (TERMINE, 'Terminé'),
+        (ECHEC, 'Échec'),
+    )
+    consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name="cv_jobs")
+    fichier = models.CharField(max_length=255)
+    statut = models.CharField(max_length=20, choices=STATUTS, default=EN_ATTENTE, db_index=True)
+    progression = models.PositiveSmallIntegerField(default=0)
+    etape = models.CharField(max_length=50, blank=True)
+    competences = models.JSONField(default=list, blank=True)
+    erreur = models.TextField(null=True, blank=True)
+    tentatives = models.PositiveSmallIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    def __str__(self):
+        return f"Job CV #{self.pk} ({self.statut})"
+
+# Cache des extractions de CV, indexé par l'empreinte SHA-256 du fichier
+class CVCache(models.Model):
+    sha256 = models.CharField(max_length=64, unique=True)
+    texte = models.TextField()
+    ocr = models.BooleanField(default=False)
+    competences = models.JSONField(default=dict, blank=True)
+    taille = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    last_used_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return self.sha256
+
+# Suivi des fichiers traités par la commande analyse_cv (reprise et exécutions incrémentales)
+class CVManifest(models.Model):
+    TERMINE = 'TERMINE'
+    IGNORE = 'IGNORE'
+    ECHEC = 'ECHEC'
+    STATUTS = (
+        (TERMINE, 'Terminé'),
+        (IGNORE, 'Ignoré'),
+        (ECHEC, 'Échec'),
+    )
+    chemin = models.CharField(max_length=500, unique=True)
+    taille = models.BigIntegerField()
+    mtime = models.FloatField()
+    sha256 = models.CharField(max_length=64)
+    statut = models.CharField(max_length=20, choices=STATUTS, db_index=True)
+    erreur = models.TextField(null=True, blank=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.chemin} ({self.statut})"
+
+# Texte extrait du CV de chaque consultant, indexé en plein texte (voir consultants.fulltext)
+class CVTexte(models.Model):
+    consultant = models.OneToOneField(Consultant, on_delete=models.CASCADE, related_name="cv_texte")
+    sha256 = models.CharField(max_length=64)
+    texte = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"CV de {self.consultant_id}"
+
+# Consultants dont les compétences ou disponibilités ont changé depuis le dernier
+# calcul de la matrice consultants x compétences (voir consultants.matching)
+class MatchingChange(models.Model):
+    # Pas de clé étrangère : la suppression d'un consultant doit rester visible
+    consultant_id = models.BigIntegerField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return f"Changement #{self.pk} ({self.consultant_id})"
+
 # Appels d'Offres
 class AppelOffre(models.Model):
     numero = models.CharField(max_length=50, unique=True)
@@ -64,6 +176,47 @@ class CriteresEvaluation(models.Model):
     def __str__(self):
         return self.nom_critere
 
+# Propositions des consultants à un appel d'offres ; score et rang calculés
+# pour tout l'appel d'offres à la fois (voir consultants.scoring)
+class Proposition(models.Model):
+    EN_ATTENTE = "EN ATTENTE"
+    ACCEPTEE = "ACCEPTEE"
+    REJETEE = "REJETEE"
+    STATUTS = [(EN_ATTENTE, "En attente"), (ACCEPTEE, "Acceptée"), (REJETEE, "Rejetée")]
+
+    appel_offre = models.ForeignKey(AppelOffre, on_delete=models.CASCADE, related_name="propositions")
+    consultant = models.ForeignKey(Consultant, on_delete=models.CASCADE, related_name="propositions")
+    date_soumission = models.DateField()
+    montant_propose_usd = models.DecimalField(max_digits=15, decimal_places=2)
+    statut = models.CharField(max_length=50, choices=STATUTS, default=EN_ATTENTE)
+    score_final = models.DecimalField(max_digits=5, decimal_places=2, null=True, blank=True,
+                                      help_text="Score total sur 100")
+    rang = models.PositiveIntegerField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["appel_offre", "consultant"], name="proposition_appel_offre_consultant_uniq"),
+        ]
+        indexes = [models.Index(fields=["appel_offre", "rang"], name="proposition_classement_idx")]
+
+    def __str__(self):
+        return f"Proposition de {self.consultant} pour {self.appel_offre}"
+
+# Note d'une proposition sur un critère d'évaluation de l'appel d'offres
+class Evaluation(models.Model):
+    proposition = models.ForeignKey(Proposition, on_delete=models.CASCADE, related_name="evaluations")
+    critere = models.ForeignKey(CriteresEvaluation, on_delete=models.CASCADE, related_name="evaluations")
+    note = models.DecimalField(max_digits=5, decimal_places=2, help_text="Note sur 100")
+    commentaire = models.TextField(null=True, blank=True)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["proposition", "critere"], name="evaluation_proposition_critere_uniq"),
+        ]
+
+    def __str__(self):
+        return f"{self.critere} : {self.note}/100"
+
 # Missions
 class Mission(models.Model):
     appel_offre = models.ForeignKey(AppelOffre, on_delete=models.CASCADE, related_name="missions")
@@ -72,6 +225,10 @@ class Mission(models.Model):
     date_fin = models.DateField()
     statut = models.CharField(max_length=20)
 
+    class Meta:
+        # Missions chevauchant une période (voir consultants.staffing)
+        indexes = [models.Index(fields=["date_debut", "date_fin"], name="mission_dates_idx")]
+
     def __str__(self):
         return self.titre
 
@@ -82,6 +239,10 @@ class ParticipationMission(models.Model):
     role = models.CharField(max_length=50)
     evaluation = models.IntegerField()
 
+    class Meta:
+        # Missions d'un consultant lues depuis l'index, sans accès à la table
+        indexes = [models.Index(fields=["consultant", "mission"], name="participation_consultant_idx")]
+
     def __str__(self):
         return f"{self.consultant} - {self.role}"
 
@@ -0,0 +1,69 @@
+import logging
+import re
+import threading
+import time
+from django.conf import settings
+from .metrics import span
+
+logger = logging.getLogger(__name__)
+
+# L'extracteur n'utilise que les entités (ner) et les catégories (tagger + attribute_ruler)
+EXCLUDED_COMPONENTS = ["parser", "lemmatizer", "senter"]
+
+_nlp = None
+_lock = threading.Lock()
+
+
+def get_nlp():
+    """Modèle spaCy chargé au premier appel puis partagé par le processus"""
+    global _nlp
+    if _nlp is None:
+        with _lock:
+            if _nlp is None:
+                import spacy
+
+                start = time.perf_counter()
+                _nlp = spacy.load(settings.CV_NLP_MODEL, exclude=EXCLUDED_COMPONENTS)
+                logger.info(
+                    "Modèle spaCy %s chargé en %.2fs (composants : %s)",
+                    settings.CV_NLP_MODEL, time.perf_counter() - start, ", ".join(_nlp.pipe_names),
+                )
+    return _nlp
+
+
+def preload(freeze=True):
+    """Chargement anticipé, par exemple dans le processus parent avant fork des workers
+
+    Après fork, les pages du modèle sont partagées en copie sur écriture ;
+    gc.freeze() évite que le ramasse-miettes des fils ne les recopie en les
+    parcourant. Sans fork à suivre, freeze=False.
+    """
+    import gc
+
+    nlp = get_nlp()
+    if freeze:
+        gc.collect()
+        gc.freeze()
+    return nlp
+
+
+def extract_competences(text):
+    """Compétences candidates : entités nommées et noms propres/communs"""
+    with span("nlp", caracteres=len(text)) as attrs:
+        doc_nlp = get_nlp()(text)
+        competences = set()
+
+        for ent in doc_nlp.ents:
+            if ent.label_ in ["ORG", "PRODUCT", "SKILL", "WORK_OF_ART", "LANGUAGE"]:
+                cleaned = ent.text.strip().title()
+                if 2 < len(cleaned) < 40 and not re.search(r"\d", cleaned):
+                    competences.add(cleaned)
+
+        for token in doc_nlp:
+            if token.pos_ in ["PROPN", "NOUN"] and token.is_alpha and token.ent_type_ == "":
+                cleaned = token.text.strip().title()
+                if 2 < len(cleaned) < 30:
+                    competences.add(cleaned)
+
+        attrs.update(entites=len(doc_nlp.ents), competences=len(competences))
+    return list(competences)
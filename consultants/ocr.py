@@ -0,0 +1,137 @@
+import logging
+import os
+import re
+from django.conf import settings
+
+logger = logging.getLogger(__name__)
+
+# Caractères autorisés pour les CV en alphabet latin ; les profils qui
+# incluent l'arabe n'en ont pas (la liste éliminerait l'écriture arabe)
+LATIN_WHITELIST = (
+    "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789@.-_+/(),:"
+    "àéèêëïîôùûçâäÀÉÈÊËÏÎÔÙÛÇÂÄ"
+)
+
+# Nombre minimum de lettres dans l'échantillon pour se prononcer sur la langue
+MIN_SAMPLE_LETTERS = 40
+
+# Part minimale d'une écriture pour charger le ou les modèles correspondants
+MIN_SCRIPT_SHARE = 0.1
+
+# Résolution du rendu d'échantillon quand le document n'a pas de couche texte
+SAMPLE_DPI = 100
+
+FRENCH_WORDS = {
+    "le", "la", "les", "des", "du", "de", "et", "en", "pour", "avec", "dans", "une", "un",
+    "sur", "au", "aux", "ans", "expérience", "formation", "compétences", "projet",
+}
+ENGLISH_WORDS = {
+    "the", "and", "of", "with", "in", "for", "to", "on", "at", "years", "experience",
+    "education", "skills", "project", "university",
+}
+
+WORD_RE = re.compile(r"[^\W\d_]+")
+
+
+def is_arabic(char):
+    return (
+        "\u0600" <= char <= "\u06ff" or "\u0750" <= char <= "\u077f"
+        or "\ufb50" <= char <= "\ufdff" or "\ufe70" <= char <= "\ufeff"
+    )
+
+
+def script_counts(text):
+    """(lettres arabes, lettres latines) du texte"""
+    arabe = latin = 0
+    for char in text:
+        if is_arabic(char):
+            arabe += 1
+        elif char.isalpha() and char < "\u0250":
+            latin += 1
+    return arabe, latin
+
+
+def latin_languages(text):
+    """fra, eng ou les deux selon les mots courants de chaque langue"""
+    words = [word.casefold() for word in WORD_RE.findall(text)]
+    fr = sum(word in FRENCH_WORDS for word in words)
+    en = sum(word in ENGLISH_WORDS for word in words)
+    if fr >= 2 * en and fr:
+        return ["fra"]
+    if en >= 2 * fr and en:
+        return ["eng"]
+    return ["fra", "eng"]
+
+
+def detect_languages(text):
+    """Modèles Tesseract nécessaires pour un échantillon de texte, None si indécidable"""
+    arabe, latin = script_counts(text)
+    total = arabe + latin
+    if total < MIN_SAMPLE_LETTERS:
+        return None
+
+    langues = []
+    if latin / total >= MIN_SCRIPT_SHARE:
+        langues += latin_languages(text)
+    if arabe / total >= MIN_SCRIPT_SHARE:
+        langues.append("ara")
+    return langues
+
+
+class OCRProfile:
+    """Langues et options Tesseract d'un document"""
+
+    def __init__(self, langues, psm=6):
+        # Ordre et filtre de CV_OCR_LANGUAGES : seuls les modèles installés
+        installed = settings.CV_OCR_LANGUAGES
+        self.langues = [langue for langue in installed if langue in langues] or list(installed)
+        self.psm = psm
+
+    @property
+    def name(self):
+        return "+".join(self.langues)
+
+    @property
+    def whitelist(self):
+        return None if "ara" in self.langues else LATIN_WHITELIST
+
+    def config(self):
+        config = f"-l {self.name} --oem 3 --psm {self.psm}"
+        if self.whitelist:
+            config += f" -c tessedit_char_whitelist={self.whitelist}"
+        return config
+
+    def __repr__(self):
+        return f"OCRProfile({self.name})"
+
+
+def default_profile():
+    """Tous les modèles installés, quand la langue n'a pas pu être détectée"""
+    return OCRProfile(settings.CV_OCR_LANGUAGES)
+
+
+def profile_for_text(text):
+    langues = detect_languages(text)
+    return OCRProfile(langues) if langues else None
+
+
+def limit_threads():
+    # Hérité par les processus tesseract lancés ensuite ; une valeur déjà
+    # définie dans l'environnement reste prioritaire
+    os.environ.setdefault("OMP_THREAD_LIMIT", str(settings.CV_OCR_THREADS))
+
+
+def ocr_image(img, profile, timeout=None):
+    """Texte d'une image ; chaîne vide si Tesseract dépasse le délai"""
+    import pytesseract
+
+    limit_threads()
+    timeout = settings.CV_OCR_PAGE_TIMEOUT if timeout is None else timeout
+    try:
+        return pytesseract.image_to_string(img, config=profile.config(), timeout=timeout)
+    except RuntimeError as exc:
+        # pytesseract signale le dépassement de délai par un RuntimeError
+        if "timeout" not in str(exc).lower():
+            raise
+        logger.warning("OCR interrompu après %ss (profil %s)", timeout, profile.name)
+        return ""
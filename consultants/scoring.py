@@ -0,0 +1,69 @@
+from django.db import transaction
+from django.db.models import DecimalField, F, FloatField, OuterRef, Subquery, Sum, Value, Window
+from django.db.models.functions import Cast, Rank, Round
+from .bulk import BATCH_SIZE
+from .models import CriteresEvaluation, Evaluation, Proposition
+
+
+def score_expression(appel_offre_id, total_poids):
+    """Score sur 100 d'une proposition : moyenne de ses notes pondérée par les poids des critères
+
+    Un critère sans note compte pour 0 ; une proposition sans aucune note
+    reste sans score (NULL) et n'est pas classée.
+    """
+    notes = (
+        Evaluation.objects.filter(proposition=OuterRef("pk"), critere__appel_offre_id=appel_offre_id)
+        .values("proposition")
+        .annotate(total=Sum(F("note") * F("critere__poids")))
+        .values("total")
+    )
+    # Division réelle : SQLite stocke les décimaux entiers en INTEGER et
+    # tronquerait le quotient avant l'arrondi
+    quotient = Cast(Subquery(notes, output_field=DecimalField()), FloatField()) / Value(
+        float(total_poids), output_field=FloatField()
+    )
+    return Round(quotient, 2, output_field=DecimalField(max_digits=5, decimal_places=2))
+
+
+def recompute_scores(appel_offre_id, batch_size=BATCH_SIZE):
+    """Scores et rangs de toutes les propositions d'un appel d'offres
+
+    Un UPDATE calcule tous les scores côté base, une lecture avec RANK()
+    donne les rangs (ex aequo au même rang), seuls les rangs modifiés sont
+    réécrits par bulk_update. Retourne les compteurs.
+    """
+    with transaction.atomic():
+        total_poids = CriteresEvaluation.objects.filter(appel_offre_id=appel_offre_id).aggregate(
+            total=Sum("poids")
+        )["total"]
+        propositions = Proposition.objects.filter(appel_offre_id=appel_offre_id)
+        if total_poids:
+            count = propositions.update(score_final=score_expression(appel_offre_id, total_poids))
+        else:
+            count = propositions.update(score_final=None)
+
+        rows = propositions.annotate(
+            nouveau_rang=Window(Rank(), order_by=[F("score_final").desc(nulls_last=True)])
+        ).values_list("id", "rang", "score_final", "nouveau_rang")
+        changed = [
+            Proposition(id=proposition_id, rang=nouveau_rang if score is not None else None)
+            for proposition_id, rang, score, nouveau_rang in rows
+            if rang != (nouveau_rang if score is not None else None)
+        ]
+        Proposition.objects.bulk_update(changed, ["rang"], batch_size=batch_size)
+
+    return {"propositions": count, "rangs_modifies": len(changed)}
+
+
+def reweight(appel_offre_id, poids):
+    """Nouveaux poids {critere_id: poids} puis recalcul des scores ; ValueError si un critère est étranger"""
+    criteres = CriteresEvaluation.objects.filter(appel_offre_id=appel_offre_id).in_bulk(poids.keys())
+    unknown = set(poids) - set(criteres)
+    if unknown:
+        raise ValueError(f"Critères inconnus pour cet appel d'offres : {sorted(unknown)}")
+
+    with transaction.atomic():
+        for critere_id, valeur in poids.items():
+            criteres[critere_id].poids = valeur
+        CriteresEvaluation.objects.bulk_update(criteres.values(), ["poids"])
+        return recompute_scores(appel_offre_id)
@@ -0,0 +1,61 @@
+from django.db.models import Exists, OuterRef, Prefetch
+from rest_framework.pagination import CursorPagination
+from .models import Competence, Consultant
+from .skills import lookup_skills
+
+
+class ConsultantCursorPagination(CursorPagination):
+    """Pagination par curseur (WHERE id > dernier id) : coût constant quelle que soit la page"""
+    ordering = "id"
+    page_size = 20
+    page_size_query_param = "limit"
+    max_page_size = 100
+
+
+def search_consultants(skills=(), pays=None, ville=None, disponible_du=None, disponible_au=None):
+    """Consultants possédant toutes les compétences, dans la localité, disponibles sur toute la fenêtre
+
+    Les noms sont ramenés aux Skill du référentiel (variantes et alias
+    compris) ; chaque compétence est un EXISTS servi par l'index unique
+    (consultant_id, skill_id).
+    """
+    skills = list(dict.fromkeys(skills))
+    skill_ids = lookup_skills(skills)
+    if len(skill_ids) < len(skills):
+        # Une compétence absente du référentiel : aucun consultant ne peut correspondre
+        return Consultant.objects.none()
+
+    queryset = Consultant.objects.all()
+    for skill_id in set(skill_ids.values()):
+        queryset = queryset.filter(Exists(
+            Competence.objects.filter(consultant_id=OuterRef("pk"), skill_id=skill_id)
+        ))
+    if pays:
+        queryset = queryset.filter(pays=pays)
+    if ville:
+        queryset = queryset.filter(ville=ville)
+    if disponible_du:
+        queryset = queryset.filter(date_debut_dispo__lte=disponible_du)
+    if disponible_au:
+        queryset = queryset.filter(date_fin_dispo__gte=disponible_au)
+
+    return queryset.only(
+        "id", "nom", "prenom", "email", "pays", "ville", "date_debut_dispo", "date_fin_dispo",
+    ).prefetch_related(Prefetch(
+        "competences",
+        queryset=Competence.objects.select_related("skill").only("consultant_id", "skill__nom").order_by("id"),
+    ))
+
+
+def consultant_summary(consultant):
+    return {
+        "id": consultant.id,
+        "firstName": consultant.prenom,
+        "lastName": consultant.nom,
+        "email": consultant.email,
+        "country": consultant.pays,
+        "city": consultant.ville,
+        "startAvailability": consultant.date_debut_dispo,
+        "endAvailability": consultant.date_fin_dispo,
+        "skills": [c.nom_competence for c in consultant.competences.all()],
+    }
@@ -19,6 +19,28 @@ class ConsultantSerializer(serializers.ModelSerializer):
 
 
 class CompetenceSerializer(serializers.ModelSerializer):
+    nom_competence = serializers.CharField(source='skill.nom', read_only=True)
+
     class Meta:
         model = Competence
         fields = ['id', 'nom_competence', 'niveau', 'consultant']
+
+
+class ConsultantImportSerializer(serializers.ModelSerializer):
+    """Ligne d'import : champs de ConsultantSerializer sans compte ni CV, compétences « nom:niveau;nom »"""
+    competences = serializers.CharField(required=False, allow_blank=True, default="")
+
+    class Meta:
+        model = Consultant
+        fields = [
+            'email',
+            'nom',
+            'prenom',
+            'telephone',
+            'pays',
+            'ville',
+            'date_debut_dispo',
+            'date_fin_dispo',
+            'competences',
+        ]
+        extra_kwargs = {'email': {'required': True, 'allow_blank': False}}
@@ -0,0 +1,37 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from .changes import consultants_changed
+from .models import Competence, Consultant, Skill, User
+from .skills import resolver
+
+# bulk_create / bulk_update / update() n'envoient pas ces signaux :
+# les écritures groupées signalent elles-mêmes leurs changements (voir consultants.bulk)
+
+
+@receiver([post_save, post_delete], sender=Consultant)
+def consultant_changed(sender, instance, **kwargs):
+    consultants_changed([instance.pk])
+
+
+@receiver([post_save, post_delete], sender=Competence)
+def competence_changed(sender, instance, **kwargs):
+    consultants_changed([instance.consultant_id])
+
+
+@receiver(post_save, sender=User)
+def user_changed(sender, instance, created, **kwargs):
+    # La suppression d'un User supprime son consultant en cascade (signal ci-dessus)
+    # Connexion (last_login seul) : la fiche ne change pas
+    if created or kwargs.get("update_fields") == frozenset({"last_login"}):
+        return
+    consultants_changed(Consultant.objects.filter(user_id=instance.pk).values_list("id", flat=True))
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def skill_changed(sender, instance, **kwargs):
+    # Nom ou alias modifiés : cache des noms de ce processus et fiches des consultants concernés
+    from . import matching  # numpy et scipy : chargés seulement ici et au classement
+
+    resolver.clear()
+    matching.forget_skill_names()
+    consultants_changed(Competence.objects.filter(skill_id=instance.pk).values_list("consultant_id", flat=True))
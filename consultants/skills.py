@@ -0,0 +1,89 @@
+import threading
+from django.db import transaction
+from .models import Skill
+from .taxonomy import get_taxonomy, skill_key
+
+
+class SkillResolver:
+    """Correspondance nom de compétence -> id de Skill, gardée en mémoire par processus
+
+    Les clés et alias de la table Skill sont chargés au premier appel ; une
+    clé inconnue du cache est cherchée en base (créée par un autre processus)
+    avant d'être créée. Ce qui est lu dans une transaction n'entre dans le
+    cache qu'au commit : un rollback ne laisse pas d'id inexistant.
+    """
+
+    def __init__(self):
+        self._ids = None
+        # Réentrant : hors transaction, on_commit rappelle aussitôt _remember
+        self._lock = threading.RLock()
+        self._generation = 0
+
+    def _index(self):
+        if self._ids is not None:
+            return self._ids
+        ids = {}
+        for skill_id, cle, aliases in Skill.objects.values_list("id", "cle", "aliases").iterator():
+            ids[cle] = skill_id
+            for alias in aliases or ():
+                ids.setdefault(skill_key(alias), skill_id)
+        generation = self._generation
+        transaction.on_commit(lambda: self._remember(generation, ids))
+        return ids
+
+    def _remember(self, generation, ids):
+        with self._lock:
+            # Cache vidé entre-temps (clear) : la lecture est peut-être périmée
+            if generation != self._generation:
+                return
+            if self._ids is None:
+                self._ids = ids
+            else:
+                self._ids.update(ids)
+
+    def clear(self):
+        with self._lock:
+            self._ids = None
+            self._generation += 1
+
+    def lookup(self, names):
+        """{nom: id} des compétences connues, sans création"""
+        taxonomy = get_taxonomy()
+        keys = {name: taxonomy.skill_identity(name)[1] for name in names}
+        with self._lock:
+            ids = self._index()
+            missing = {key for key in keys.values() if key and key not in ids}
+            fetched = {}
+            if missing:
+                fetched = dict(Skill.objects.filter(cle__in=missing).values_list("cle", "id"))
+                generation = self._generation
+                transaction.on_commit(lambda: self._remember(generation, fetched))
+            found = {name: ids.get(key, fetched.get(key)) for name, key in keys.items()}
+            return {name: skill_id for name, skill_id in found.items() if skill_id is not None}
+
+    def resolve(self, names):
+        """{nom: id}, les compétences absentes du référentiel sont créées"""
+        found = self.lookup(names)
+        taxonomy = get_taxonomy()
+        new = {}
+        for name in names:
+            if name not in found:
+                nom, cle, aliases = taxonomy.skill_identity(name)
+                if cle:
+                    new.setdefault(cle, Skill(nom=nom, cle=cle, aliases=aliases))
+        if new:
+            # Un autre processus peut créer la même clé en parallèle
+            Skill.objects.bulk_create(new.values(), ignore_conflicts=True)
+            found.update(self.lookup([name for name in names if name not in found]))
+        return found
+
+
+resolver = SkillResolver()
+
+
+def lookup_skills(names):
+    return resolver.lookup(names)
+
+
+def resolve_skills(names):
+    return resolver.resolve(names)
@@ -0,0 +1,71 @@
+from django.db.models import Exists, OuterRef
+from .models import Consultant, ParticipationMission
+from .search import search_consultants
+
+
+def overlapping(debut, fin, prefix="mission__"):
+    """Filtre des missions chevauchant [debut, fin] (bornes incluses)"""
+    return {f"{prefix}date_debut__lte": fin, f"{prefix}date_fin__gte": debut}
+
+
+def bookings(debut, fin):
+    """Participations à une mission qui chevauche [debut, fin]"""
+    return ParticipationMission.objects.filter(**overlapping(debut, fin))
+
+
+def free_consultants(debut, fin, skills=(), pays=None, ville=None):
+    """Consultants disponibles sur toute la fenêtre et sans mission qui la chevauche
+
+    Une seule requête : la fenêtre de disponibilité est servie par
+    consultant_dispo_idx, l'absence de mission par un NOT EXISTS sur
+    participation_consultant_idx puis mission_dates_idx.
+    """
+    return search_consultants(skills, pays, ville, disponible_du=debut, disponible_au=fin).exclude(
+        Exists(bookings(debut, fin).filter(consultant_id=OuterRef("pk")))
+    )
+
+
+def consultant_conflicts(consultant_ids, debut=None, fin=None):
+    """Conflits de planning de plusieurs consultants, en deux requêtes
+
+    Avec une fenêtre : les missions qui la chevauchent et l'indisponibilité
+    déclarée. Sans fenêtre : les paires de missions qui se chevauchent
+    (double réservation), trouvées par balayage des missions triées.
+    Retourne {consultant_id: {"indisponible": bool, "missions": [...], "chevauchements": [...]}}.
+    """
+    consultant_ids = list(dict.fromkeys(consultant_ids))
+    consultants = Consultant.objects.filter(id__in=consultant_ids).values_list(
+        "id", "date_debut_dispo", "date_fin_dispo"
+    )
+    result = {
+        consultant_id: {
+            "indisponible": bool(debut and fin) and not (dispo_debut <= debut and dispo_fin >= fin),
+            "missions": [],
+            "chevauchements": [],
+        }
+        for consultant_id, dispo_debut, dispo_fin in consultants
+    }
+
+    participations = ParticipationMission.objects.filter(consultant_id__in=result.keys())
+    if debut and fin:
+        participations = participations.filter(**overlapping(debut, fin))
+    rows = participations.order_by("consultant_id", "mission__date_debut", "mission_id").values_list(
+        "consultant_id", "mission_id", "mission__titre", "mission__date_debut", "mission__date_fin", "role",
+    )
+
+    for consultant_id, mission_id, titre, mission_debut, mission_fin, role in rows:
+        entry = result[consultant_id]
+        mission = {"mission_id": mission_id, "titre": titre, "debut": mission_debut,
+                   "fin": mission_fin, "role": role}
+        if not (debut and fin):
+            # Missions triées par début : seules celles encore en cours peuvent chevaucher
+            entry["_actives"] = [m for m in entry.get("_actives", []) if m["fin"] >= mission_debut]
+            entry["chevauchements"].extend(
+                [m["mission_id"], mission_id] for m in entry["_actives"]
+            )
+            entry["_actives"].append(mission)
+        entry["missions"].append(mission)
+
+    for entry in result.values():
+        entry.pop("_actives", None)
+    return result
@@ -0,0 +1,143 @@
+import json
+import re
+import unicodedata
+from functools import lru_cache
+from pathlib import Path
+from django.conf import settings
+
+DEFAULT_TAXONOMY_PATH = Path(__file__).resolve().parent / "data" / "taxonomie.json"
+
+# Mots et symboles . + # pris isolément : "Node.js", "C++", "C#" restent reconnaissables
+# sans coller deux mots séparés par un point (clean_text supprime l'espace qui suit)
+TOKEN_RE = re.compile(r"\w+|[.+#]")
+
+
+def normalize(text):
+    """Minuscules sans accents ni signes diacritiques (latin et arabe)"""
+    text = unicodedata.normalize("NFKD", text.casefold())
+    return "".join(c for c in text if not unicodedata.combining(c)).replace("ـ", "")
+
+
+def tokenize(text):
+    return [m.group() for m in TOKEN_RE.finditer(normalize(text))]
+
+
+# Longueur des colonnes Skill.nom et Skill.cle
+SKILL_MAX_LENGTH = 255
+
+
+def skill_key(name):
+    """Clé de regroupement d'un nom de compétence : "Python ", "python" et "Pythons" donnent "python"
+
+    Minuscules sans accents, espaces et ponctuation ignorés, "s" final du
+    dernier mot retiré (sauf -ss, -us, -is et mots courts).
+    """
+    tokens = tokenize(name)
+    if not tokens:
+        return ""
+    last = tokens[-1]
+    if len(last) > 3 and last.isalpha() and last.endswith("s") and not last.endswith(("ss", "us", "is")):
+        tokens[-1] = last[:-1]
+    return " ".join(tokens)[:SKILL_MAX_LENGTH]
+
+
+class TaxonomyMatcher:
+    """Recherche en une passe de toutes les expressions d'un dictionnaire
+
+    Les expressions (noms canoniques et alias) sont découpées en mots et
+    compilées dans un trie ; le texte est parcouru une seule fois, mot par mot,
+    en retenant à chaque position la correspondance la plus longue. Le coût
+    dépend de la longueur du texte, pas de la taille du dictionnaire, et les
+    limites de mots sont respectées par construction.
+    """
+
+    def __init__(self, entries):
+        # entries : {nom canonique: [alias, ...]}
+        self.root = {}
+        self.max_depth = 0
+        for canonical, aliases in entries.items():
+            for expression in [canonical, *aliases]:
+                self.add(expression, canonical)
+
+    def add(self, expression, canonical):
+        tokens = tokenize(expression)
+        if not tokens:
+            return
+        node = self.root
+        for token in tokens:
+            node = node.setdefault(token, {})
+        # La clé None marque la fin d'une expression
+        node.setdefault(None, canonical)
+        self.max_depth = max(self.max_depth, len(tokens))
+
+    def iter_matches(self, text):
+        """Noms canoniques dans l'ordre du texte (correspondance la plus longue à gauche)"""
+        tokens = tokenize(text)
+        i = 0
+        while i < len(tokens):
+            node, match, length = self.root, None, 0
+            for depth in range(min(self.max_depth, len(tokens) - i)):
+                node = node.get(tokens[i + depth])
+                if node is None:
+                    break
+                if None in node:
+                    match, length = node[None], depth + 1
+
+            if match is None:
+                i += 1
+            else:
+                yield match
+                i += length
+
+    def find_all(self, text):
+        """Noms canoniques distincts, dans l'ordre d'apparition"""
+        return list(dict.fromkeys(self.iter_matches(text)))
+
+    def find_first(self, text):
+        return next(self.iter_matches(text), None)
+
+    def lookup(self, text):
+        """Nom canonique si le texte entier est une expression du dictionnaire, sinon None"""
+        node = self.root
+        for token in tokenize(text):
+            node = node.get(token)
+            if node is None:
+                return None
+        return node.get(None)
+
+
+class Taxonomy:
+    def __init__(self, data):
+        self.competences = TaxonomyMatcher(data.get("competences", {}))
+        self.competence_aliases = data.get("competences", {})
+        localites = data.get("localites", {})
+        self.pays = {ville: info["pays"] for ville, info in localites.items()}
+        self.localites = TaxonomyMatcher({ville: info.get("alias", []) for ville, info in localites.items()})
+
+    def find_location(self, text):
+        """(ville, pays) de la première localité citée, ou None"""
+        ville = self.localites.find_first(text)
+        return (ville, self.pays[ville]) if ville else None
+
+    def skill_identity(self, name):
+        """(nom, clé, alias) d'un nom de compétence, ramené au nom canonique du référentiel s'il y figure"""
+        canonical = self.competences.lookup(name)
+        if canonical:
+            return canonical, skill_key(canonical), list(self.competence_aliases[canonical])
+        nom = " ".join(name.split())[:SKILL_MAX_LENGTH]
+        return nom, skill_key(nom), []
+
+
+@lru_cache(maxsize=None)
+def load_taxonomy(path):
+    with open(path, encoding="utf-8") as f:
+        return Taxonomy(json.load(f))
+
+
+def taxonomy_path():
+    return str(getattr(settings, "CV_TAXONOMY_PATH", DEFAULT_TAXONOMY_PATH))
+
+
+def get_taxonomy():
+    """Taxonomie compilée une fois par processus (CV_TAXONOMY_PATH pour la remplacer)"""
+    return load_taxonomy(taxonomy_path())
@@ -1,3 +1,683 @@
-from django.test import TestCase
+import gzip
+import io
+import json
+import os
+import tempfile
+import time
+import zipfile
+from datetime import date, timedelta
+from decimal import Decimal
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from . import cv_cache
+from .bulk import bulk_add_competences, bulk_upsert_consultants
+from .extraction import render_page
+from .fulltext import index_cv_texts, search_cv_texts
+from .jobs import claim_next_job, enqueue_cv_job
+from .models import (
+    AppelOffre, Competence, Consultant, CriteresEvaluation, CVCache, CVJob, CVTexte, Evaluation, MatchingChange,
+    Mission, ParticipationMission, Proposition, Skill, User,
+)
+from .ocr import LATIN_WHITELIST, OCRProfile, detect_languages
+from .scoring import recompute_scores, reweight
+from .staffing import consultant_conflicts, free_consultants
+from .taxonomy import get_taxonomy, skill_key
 
-# Create your tests here.
+LOCMEM_CACHES = {"default": {"BACKEND": "django.core.cache.backends.locmem.LocMemCache"}}
+
+
+def make_consultant(numero, **fields):
+    user = User.objects.create_user(username=f"consultant{numero}@example.com", password="x", nom="Test")
+    values = {
+        "nom": f"Nom{numero}", "prenom": f"Prenom{numero}", "email": user.username,
+        "telephone": "000", "pays": "Maroc", "ville": "Rabat",
+        "date_debut_dispo": date(2025, 1, 1), "date_fin_dispo": date(2025, 12, 31),
+    }
+    values.update(fields)
+    return Consultant.objects.create(user=user, **values)
+
+
+def make_appel_offre(numero="AO-1"):
+    return AppelOffre.objects.create(
+        numero=numero, nom_projet="Projet", description="", budget_usd=Decimal("1000"),
+        date_limite=date(2025, 6, 30), methode_passation="AOO", statut="OUVERT",
+    )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ScoringTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.appel_offre = make_appel_offre()
+        cls.criteres = [
+            CriteresEvaluation.objects.create(appel_offre=cls.appel_offre, nom_critere=nom, poids=Decimal(poids))
+            for nom, poids in [("Technique", "2.5"), ("Méthodologie", "1.5"), ("Prix", "1")]
+        ]
+        cls.propositions = {}
+        for numero, notes in [("A", [80, 70, 61]), ("B", ["75.5", 90, 40]), ("C", [72, 74, 73]), ("D", [])]:
+            proposition = Proposition.objects.create(
+                appel_offre=cls.appel_offre, consultant=make_consultant(numero),
+                date_soumission=date(2025, 5, 1), montant_propose_usd=Decimal("100"),
+            )
+            for critere, note in zip(cls.criteres, notes):
+                Evaluation.objects.create(proposition=proposition, critere=critere, note=Decimal(note))
+            cls.propositions[numero] = proposition
+
+    def classement(self):
+        return {
+            numero: tuple(Proposition.objects.values_list("score_final", "rang").get(pk=proposition.pk))
+            for numero, proposition in self.propositions.items()
+        }
+
+    def test_fractional_weights(self):
+        result = recompute_scores(self.appel_offre.id)
+
+        self.assertEqual(result["propositions"], 4)
+        self.assertEqual(self.classement(), {
+            "A": (Decimal("73.20"), 1),
+            "C": (Decimal("72.80"), 2),
+            "B": (Decimal("72.75"), 3),
+            "D": (None, None),
+        })
+
+    def test_integer_weights_keep_decimals(self):
+        # Notes et poids entiers : le quotient ne doit pas être tronqué
+        reweight(self.appel_offre.id, {critere.id: Decimal(1) for critere in self.criteres})
+
+        self.assertEqual(self.classement(), {
+            "C": (Decimal("73.00"), 1),
+            "A": (Decimal("70.33"), 2),
+            "B": (Decimal("68.50"), 3),
+            "D": (None, None),
+        })
+
+    def test_only_changed_ranks_rewritten(self):
+        recompute_scores(self.appel_offre.id)
+        self.assertEqual(recompute_scores(self.appel_offre.id)["rangs_modifies"], 0)
+
+    def test_reweight_rejects_foreign_critere(self):
+        autre = CriteresEvaluation.objects.create(
+            appel_offre=make_appel_offre("AO-2"), nom_critere="Autre", poids=Decimal(1)
+        )
+        with self.assertRaises(ValueError):
+            reweight(self.appel_offre.id, {autre.id: Decimal(2)})
+
+    def test_endpoint_rejects_invalid_weights(self):
+        url = reverse("appel-offre-scores", args=[self.appel_offre.id])
+        critere_id = str(self.criteres[0].id)
+        for valeur in ["nan", "Infinity", "abc", [1], 1000, -1]:
+            with self.subTest(valeur=valeur):
+                response = self.client.post(url, {"poids": {critere_id: valeur}}, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+    def test_endpoint_reweights(self):
+        url = reverse("appel-offre-scores", args=[self.appel_offre.id])
+        poids = {str(critere.id): 1 for critere in self.criteres}
+        response = self.client.post(url, {"poids": poids}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.classement()["A"], (Decimal("70.33"), 2))
+
+
+IMPORT_HEADER = "email,nom,prenom,telephone,pays,ville,date_debut_dispo,date_fin_dispo,competences\n"
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ImportTests(TestCase):
+    def post(self, name, content):
+        return self.client.post(reverse("consultant-import"), {"fichier": SimpleUploadedFile(name, content)})
+
+    def test_csv_import_and_reimport(self):
+        content = (
+            IMPORT_HEADER
+            + "a@example.com,Ba,Awa,1,Mauritanie,Nouakchott,2025-01-01,2025-12-31,Python:3;Django\n"
+            + "b@example.com,Sy,Ali,2,Mauritanie,Rosso,2025-02-01,2025-06-30,\n"
+            + "c@example.com,Fall,Ly,3,Mauritanie,Rosso,pas-une-date,2025-06-30,\n"
+        ).encode("utf-8")
+
+        report = self.post("roster.csv", content).json()
+        self.assertEqual((report["lignes"], report["crees"], report["erreurs"]), (3, 2, 1))
+        self.assertEqual(report["details"][0]["ligne"], 4)
+        self.assertIn("date_debut_dispo", report["details"][0]["erreurs"])
+        niveaux = dict(Competence.objects.filter(consultant__email="a@example.com")
+                       .values_list("skill__nom", "niveau"))
+        self.assertEqual(niveaux, {"Python": 3, "Django": 1})
+
+        report = self.post("roster.csv", content).json()
+        self.assertEqual((report["crees"], report["existants"]), (0, 2))
+        self.assertEqual(Consultant.objects.count(), 2)
+
+    def test_xlsx_import(self):
+        from openpyxl import Workbook
+
+        workbook = Workbook()
+        workbook.active.append(IMPORT_HEADER.strip().split(","))
+        workbook.active.append(["x@example.com", "Ba", "Awa", "1", "Mauritanie", "Atar",
+                                date(2025, 1, 1), date(2025, 12, 31), "SQL:2"])
+        buffer = io.BytesIO()
+        workbook.save(buffer)
+
+        report = self.post("roster.xlsx", buffer.getvalue()).json()
+        self.assertEqual((report["lignes"], report["crees"], report["erreurs"]), (1, 1, 0))
+
+    def test_unreadable_xlsx(self):
+        empty_zip = io.BytesIO()
+        with zipfile.ZipFile(empty_zip, "w") as archive:
+            archive.writestr("autre.txt", "pas un classeur")
+        for content in [b"pas une archive", empty_zip.getvalue()]:
+            with self.subTest(content=content[:10]):
+                response = self.post("roster.xlsx", content)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(response.json()["error"], "Fichier .xlsx illisible")
+
+    def test_unsupported_extension(self):
+        self.assertEqual(self.post("roster.txt", b"x").status_code, 400)
+
+    def test_undecodable_csv_reports_committed_rows(self):
+        lines = "".join(
+            f"u{i}@example.com,Ba,Awa,{i},Mauritanie,Atar,2025-01-01,2025-12-31,SQL\n" for i in range(300)
+        )
+        response = self.post("roster.csv", (IMPORT_HEADER + lines).encode("utf-8") + b"\xff\xfe,\xff\n")
+
+        self.assertEqual(response.status_code, 400)
+        report = response.json()
+        self.assertIn("utf-8", report["error"])
+        self.assertIsNotNone(report["interruption"])
+        self.assertGreater(report["crees"], 0)
+        self.assertEqual(report["crees"], report["lignes"])
+        self.assertEqual(Consultant.objects.count(), report["crees"])
+
+    def test_database_error_rejects_only_the_faulty_row(self):
+        # Compte déjà lié à une autre fiche : la création viole l'unicité de Consultant.user
+        make_consultant(1, email="autre@example.com")
+        content = (
+            IMPORT_HEADER
+            + "consultant1@example.com,Ba,Awa,1,Mauritanie,Atar,2025-01-01,2025-12-31,\n"
+            + "ok@example.com,Sy,Ali,2,Mauritanie,Rosso,2025-01-01,2025-12-31,SQL\n"
+        ).encode("utf-8")
+
+        response = self.post("roster.csv", content)
+        self.assertEqual(response.status_code, 200)
+        report = response.json()
+        self.assertEqual((report["crees"], report["erreurs"]), (1, 1))
+        self.assertEqual(report["details"][0]["ligne"], 2)
+        self.assertTrue(Consultant.objects.filter(email="ok@example.com").exists())
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class MatchingTests(TestCase):
+    def setUp(self):
+        from . import matching
+
+        self.matching = matching
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.path = os.path.join(directory.name, "consultants.npz")
+        settings = override_settings(MATCHING_MATRIX_PATH=self.path)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        matching._matrix = None
+        self.addCleanup(setattr, matching, "_matrix", None)
+        self.skill = Skill.objects.create(nom="Python", cle="python")
+
+    def test_reads_do_not_write_and_refresh_prunes(self):
+        self.matching.rebuild_matrix()
+        with self.captureOnCommitCallbacks(execute=True):
+            consultant = make_consultant("M")
+            Competence.objects.create(consultant=consultant, skill=self.skill, niveau=3)
+        mtime = os.path.getmtime(self.path)
+
+        ranking = self.matching.get_matrix().top_k({self.skill.id: 1.0})
+        self.assertEqual([cid for cid, _ in ranking], [consultant.id])
+        self.assertEqual(os.path.getmtime(self.path), mtime)
+        self.assertTrue(MatchingChange.objects.exists())
+
+        matrix, changes = self.matching.refresh_matrix()
+        self.assertGreater(changes, 0)
+        self.assertFalse(MatchingChange.objects.exists())
+        self.assertIn(consultant.id, self.matching.SkillMatrix.load(self.path).row_of)
+
+    def test_ranking_unavailable_until_built(self):
+        appel_offre = make_appel_offre()
+        url = reverse("appel-offre-consultants", args=[appel_offre.id])
+        self.assertEqual(self.client.get(url).status_code, 503)
+        self.assertFalse(os.path.exists(self.path))
+
+        self.matching.rebuild_matrix()
+        self.assertEqual(self.client.get(url).status_code, 200)
+
+    def test_late_committed_change_is_replayed(self):
+        first, second = make_consultant(1), make_consultant(2)
+        Competence.objects.create(consultant=first, skill=self.skill, niveau=3)
+        Competence.objects.create(consultant=second, skill=self.skill, niveau=3)
+        self.matching.rebuild_matrix()
+        first_id, second_id = first.id, second.id
+        first.delete()
+        second.delete()
+
+        # La transaction de first, validée après celle de second, publie un identifiant inférieur
+        MatchingChange.objects.create(id=100, consultant_id=second_id)
+        self.assertEqual([cid for cid, _ in self.matching.get_matrix().top_k({self.skill.id: 1.0})], [first_id])
+        MatchingChange.objects.create(id=50, consultant_id=first_id)
+        self.assertEqual(self.matching.get_matrix().top_k({self.skill.id: 1.0}), [])
+
+        matrix, changes = self.matching.refresh_matrix()
+        self.assertEqual((changes, matrix.applied), (2, {50, 100}))
+        self.assertFalse(MatchingChange.objects.exists())
+        self.assertEqual(self.matching.SkillMatrix.load(self.path).top_k({self.skill.id: 1.0}), [])
+
+
+class RenderPageTests(TestCase):
+    def test_matches_pil_pipeline(self):
+        import fitz
+        import numpy as np
+        from PIL import Image, ImageEnhance
+
+        doc = fitz.open()
+        page = doc.new_page()
+        page.draw_rect(fitz.Rect(50, 50, 300, 200), color=(1, 0, 0), fill=(0.2, 0.6, 0.9))
+        page.draw_circle((400, 400), 80, color=(0, 0.5, 0), fill=(0.9, 0.8, 0.1))
+        page.insert_text((72, 600), "Curriculum vitae", fontsize=20, color=(0.7, 0.1, 0.4))
+
+        # Chaîne d'origine : rendu RGB, conversion L puis ImageEnhance
+        pix = page.get_pixmap(dpi=100)
+        expected = Image.frombytes("RGB", [pix.width, pix.height], pix.samples).convert("L")
+        expected = ImageEnhance.Contrast(expected).enhance(3.0)
+        expected = ImageEnhance.Sharpness(expected).enhance(2.0)
+
+        np.testing.assert_array_equal(np.asarray(render_page(page, dpi=100, band=50)), np.asarray(expected))
+
+
+class AnalyseFileTests(SimpleTestCase):
+    @override_settings(CV_MAX_PAGES=2)
+    def test_rejects_documents_over_the_page_limit(self):
+        import fitz
+        from .management.commands.analyse_cv import analyse_file
+
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        path = os.path.join(directory.name, "cv.pdf")
+        with fitz.open() as doc:
+            for _ in range(3):
+                doc.new_page()
+            doc.save(path)
+
+        result = analyse_file((path, "sha", None, 1))
+        self.assertIn("dépasse 2 pages", result["error"])
+        self.assertIsNone(result["texte"])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class JobQueueTests(TestCase):
+    def test_claims_jobs_in_order_once(self):
+        consultant = make_consultant(1)
+        first = enqueue_cv_job(consultant, "cv/a.pdf")
+        second = enqueue_cv_job(consultant, "cv/b.pdf")
+
+        job = claim_next_job()
+        self.assertEqual(job.pk, first.pk)
+        job.refresh_from_db()
+        self.assertEqual((job.statut, job.tentatives, job.etape), (CVJob.EN_COURS, 1, "demarrage"))
+        self.assertEqual(claim_next_job().pk, second.pk)
+        self.assertIsNone(claim_next_job())
+
+    def test_status_endpoint(self):
+        job = enqueue_cv_job(make_consultant(1), "cv/a.pdf")
+        response = self.client.get(reverse("cv-job-status", args=[job.pk]))
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["status"], CVJob.EN_ATTENTE)
+        self.assertEqual(self.client.get(reverse("cv-job-status", args=[job.pk + 1])).status_code, 404)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BulkUpsertTests(TestCase):
+    def row(self, email, **fields):
+        values = {"email": email, "nom": "Ba", "prenom": "Awa", "telephone": "1", "pays": "Mauritanie",
+                  "ville": "Atar", "date_debut_dispo": date(2025, 1, 1), "date_fin_dispo": date(2025, 12, 31)}
+        values.update(fields)
+        return values
+
+    def test_creates_then_updates_only_changed_rows(self):
+        consultants, created = bulk_upsert_consultants([self.row("a@example.com"), self.row("b@example.com")])
+        self.assertEqual(created, {"a@example.com", "b@example.com"})
+        self.assertFalse(consultants["a@example.com"].user.has_usable_password())
+        revisions = dict(Consultant.objects.values_list("email", "revision"))
+
+        consultants, created = bulk_upsert_consultants(
+            [self.row("a@example.com"), self.row("b@example.com", ville="Kiffa")]
+        )
+        self.assertEqual(created, set())
+        self.assertEqual(Consultant.objects.get(email="b@example.com").ville, "Kiffa")
+        self.assertEqual(dict(Consultant.objects.values_list("email", "revision")), {
+            "a@example.com": revisions["a@example.com"],
+            "b@example.com": revisions["b@example.com"] + 1,
+        })
+
+    def test_emails_match_regardless_of_case(self):
+        make_consultant(1, email="Consultant1@Example.com")
+        consultants, created = bulk_upsert_consultants(
+            [self.row(" CONSULTANT1@example.com ", ville="Kiffa"), self.row("Nouveau@Example.com")]
+        )
+        self.assertEqual(created, {"Nouveau@Example.com"})
+        self.assertEqual(consultants[" CONSULTANT1@example.com "].ville, "Kiffa")
+        self.assertEqual(Consultant.objects.count(), 2)
+        nouveau = consultants["Nouveau@Example.com"]
+        self.assertEqual((nouveau.email, nouveau.user.username), ("nouveau@example.com", "nouveau@example.com"))
+
+        consultants, created = bulk_upsert_consultants([self.row("nouveau@EXAMPLE.com")])
+        self.assertEqual(created, set())
+        self.assertEqual(consultants["nouveau@EXAMPLE.com"].id, nouveau.id)
+        self.assertEqual(User.objects.filter(username__iexact="nouveau@example.com").count(), 1)
+
+
+@override_settings(CV_CACHE_EVICT_EVERY=3, CV_CACHE_MAX_ENTRIES=10, CV_CACHE_MAX_BYTES=10)
+class CVCacheTests(TestCase):
+    def setUp(self):
+        cv_cache._puts = 0
+
+    def test_periodic_eviction_by_size(self):
+        cv_cache.put("a", "ééé", False)
+        cv_cache.put("b", "ééé", False)
+        self.assertEqual(CVCache.objects.count(), 2)
+        self.assertEqual(CVCache.objects.get(sha256="a").taille, 6)
+
+        cv_cache.put("c", "ééé", False)
+        self.assertEqual(list(CVCache.objects.values_list("sha256", flat=True)), ["c"])
+        self.assertEqual(cv_cache.evict(max_entries=0), 1)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SkillTests(TestCase):
+    def test_competence_variants_share_a_skill(self):
+        consultant = make_consultant(1)
+        self.assertEqual(bulk_add_competences({consultant.id: ["Python", "python3", " PYTHON "]}, niveau=1), 1)
+        self.assertEqual(bulk_add_competences({consultant.id: ["Python"]}, niveau=1), 0)
+        self.assertEqual(Skill.objects.get().nom, "Python")
+
+
+class SkillMigrationTests(TransactionTestCase):
+    """0006 : une ligne Skill par nom normalisé, une compétence par (consultant, skill)"""
+
+    def migrate(self, target):
+        executor = MigrationExecutor(connection)
+        executor.loader.build_graph()
+        executor.migrate([("consultants", target)])
+        return executor.loader.project_state([("consultants", target)]).apps
+
+    def tearDown(self):
+        self.migrate(MigrationExecutor(connection).loader.graph.leaf_nodes("consultants")[0][1])
+
+    def test_populate_skills(self):
+        apps = self.migrate("0005_consultant_search_indexes")
+        User = apps.get_model("consultants", "User")
+        Consultant = apps.get_model("consultants", "Consultant")
+        Competence = apps.get_model("consultants", "Competence")
+        consultants = [
+            Consultant.objects.create(
+                user=User.objects.create(username=f"m{i}@example.com"), nom="Ba", prenom="Awa",
+                email=f"m{i}@example.com", telephone="", pays="Mauritanie", ville="Atar",
+                date_debut_dispo=date(2025, 1, 1), date_fin_dispo=date(2025, 12, 31),
+            )
+            for i in range(2)
+        ]
+        for consultant, nom, niveau in [
+            (consultants[0], "Python", 1), (consultants[0], "python3", 3), (consultants[0], "Gestion  de projet", 2),
+            (consultants[1], "PYTHON", 2), (consultants[1], "Rédaction", 1), (consultants[1], "  ", 1),
+        ]:
+            Competence.objects.create(consultant=consultant, nom_competence=nom, niveau=niveau)
+
+        apps = self.migrate("0006_skill")
+        Skill = apps.get_model("consultants", "Skill")
+        Competence = apps.get_model("consultants", "Competence")
+        self.assertEqual(set(Skill.objects.values_list("nom", flat=True)), {"Python", "Gestion de projet", "Rédaction"})
+        self.assertEqual(
+            sorted(Competence.objects.values_list("consultant_id", "skill__nom", "niveau")),
+            sorted([
+                (consultants[0].id, "Python", 3), (consultants[0].id, "Gestion de projet", 2),
+                (consultants[1].id, "Python", 2), (consultants[1].id, "Rédaction", 1),
+            ]),
+        )
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class SearchTests(TestCase):
+    def test_cursor_pages_are_stable_with_ties(self):
+        # Fiches identiques sur tous les critères de recherche : seul l'id les départage
+        consultants = [make_consultant(i, nom="Ba", prenom="Awa") for i in range(5)]
+        bulk_add_competences({c.id: ["Python"] for c in consultants}, niveau=1)
+
+        ids, url, pages = [], reverse("consultant-search") + "?skill=python&ville=Rabat&limit=2", 0
+        while url:
+            data = self.client.get(url).json()
+            ids += [result["id"] for result in data["results"]]
+            url, pages = data["next"], pages + 1
+            if pages == 1:
+                # Ajout et modification entre deux pages : ni doublon ni saut
+                late = make_consultant(9, nom="Ba", prenom="Awa")
+                bulk_add_competences({late.id: ["Python"]}, niveau=1)
+                Consultant.objects.filter(id=consultants[0].id).update(nom="Diallo")
+
+        self.assertEqual(ids, [c.id for c in consultants] + [late.id])
+        self.assertEqual(pages, 3)
+
+
+class FullTextTests(TestCase):
+    def hits(self, query):
+        return [consultant_id for consultant_id, _, _ in search_cv_texts(query)]
+
+    def test_index_follows_updates_and_deletes(self):
+        first, second = make_consultant(1), make_consultant(2)
+        index_cv_texts({first.id: ("a", "Ingénieur hydraulique, barrages"), second.id: ("b", "Juriste, marchés publics")})
+        self.assertEqual(self.hits("hydraulique barrages"), [first.id])
+        self.assertIn("hydraulique", search_cv_texts("hydraulique")[0][2])
+
+        index_cv_texts({first.id: ("c", "Ingénieur télécoms, fibre optique")})
+        self.assertEqual(self.hits("hydraulique"), [])
+        self.assertEqual(self.hits("fibre"), [first.id])
+        self.assertEqual(CVTexte.objects.count(), 2)
+
+        CVTexte.objects.filter(consultant=first).delete()
+        self.assertEqual(self.hits("fibre"), [])
+        second.delete()
+        self.assertEqual(self.hits("juriste"), [])
+        self.assertEqual(self.hits("?!"), [])
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class StaffingTests(TestCase):
+    def setUp(self):
+        self.appel_offre = make_appel_offre()
+        self.busy, self.idle = make_consultant(1), make_consultant(2)
+
+    def book(self, consultant, debut, fin):
+        mission = Mission.objects.create(appel_offre=self.appel_offre, titre=f"M{debut:%m%d}",
+                                         date_debut=debut, date_fin=fin, statut="EN_COURS")
+        ParticipationMission.objects.create(mission=mission, consultant=consultant, role="Expert", evaluation=0)
+        return mission
+
+    def free(self, debut, fin):
+        return set(free_consultants(debut, fin).values_list("id", flat=True))
+
+    def test_overlap_bounds_are_inclusive(self):
+        self.book(self.busy, date(2025, 3, 1), date(2025, 3, 31))
+        both = {self.busy.id, self.idle.id}
+        self.assertEqual(self.free(date(2025, 2, 1), date(2025, 2, 28)), both)
+        self.assertEqual(self.free(date(2025, 2, 1), date(2025, 3, 1)), {self.idle.id})
+        self.assertEqual(self.free(date(2025, 3, 31), date(2025, 4, 30)), {self.idle.id})
+        self.assertEqual(self.free(date(2025, 4, 1), date(2025, 4, 30)), both)
+        # Fenêtre de disponibilité : bornes incluses elles aussi
+        self.assertEqual(self.free(date(2025, 4, 1), date(2025, 12, 31)), both)
+        self.assertEqual(self.free(date(2025, 4, 1), date(2026, 1, 1)), set())
+
+    def test_conflicts_on_touching_missions(self):
+        first = self.book(self.busy, date(2025, 3, 1), date(2025, 3, 31))
+        second = self.book(self.busy, date(2025, 3, 31), date(2025, 4, 15))
+        self.book(self.busy, date(2025, 4, 16), date(2025, 4, 30))
+
+        conflicts = consultant_conflicts([self.busy.id, self.idle.id])
+        self.assertEqual(conflicts[self.busy.id]["chevauchements"], [[first.id, second.id]])
+        self.assertEqual(len(conflicts[self.busy.id]["missions"]), 3)
+        self.assertEqual(conflicts[self.idle.id]["missions"], [])
+
+        conflicts = consultant_conflicts([self.busy.id], date(2025, 3, 31), date(2025, 3, 31))
+        self.assertEqual([m["mission_id"] for m in conflicts[self.busy.id]["missions"]], [first.id, second.id])
+        self.assertFalse(conflicts[self.busy.id]["indisponible"])
+        conflicts = consultant_conflicts([self.busy.id], date(2024, 12, 31), date(2025, 1, 10))
+        self.assertTrue(conflicts[self.busy.id]["indisponible"])
+
+
+class TaxonomyTests(SimpleTestCase):
+    def setUp(self):
+        self.taxonomy = get_taxonomy()
+
+    def test_symbols_are_part_of_skill_names(self):
+        self.assertEqual(
+            self.taxonomy.competences.find_all("Développement C++, C# et Node.js. Java puis JavaScript"),
+            ["C++", "C#", "Node.js", "Java", "JavaScript"],
+        )
+        self.assertEqual(self.taxonomy.competences.find_all("cpp, csharp, nodejs"), ["C++", "C#", "Node.js"])
+        self.assertNotEqual(skill_key("C++"), skill_key("C#"))
+        self.assertEqual(self.taxonomy.skill_identity(" csharp")[0], "C#")
+
+    def test_accents_and_case_are_folded(self):
+        self.assertEqual(
+            self.taxonomy.competences.find_all("SUIVI-EVALUATION, comptabilite et gestion de projét"),
+            ["Suivi-évaluation", "Comptabilité", "Gestion de projet"],
+        )
+
+    def test_vue_is_not_an_alias(self):
+        self.assertEqual(self.taxonomy.competences.find_all("Mission en vue d'un audit"), ["Audit"])
+        self.assertEqual(self.taxonomy.competences.find_all("Front-end Vue.js (vuejs)"), ["Vue.js"])
+
+
+@override_settings(CV_OCR_LANGUAGES=["fra", "ara", "eng"])
+class OCRProfileTests(SimpleTestCase):
+    def test_languages_follow_the_script(self):
+        self.assertIsNone(detect_languages("CV court"))
+        self.assertEqual(
+            detect_languages("Ingénieur avec dix ans d'expérience dans la gestion de projet et la formation des équipes"),
+            ["fra"],
+        )
+        self.assertEqual(
+            detect_languages("Engineer with ten years of experience in project management and the training of teams"),
+            ["eng"],
+        )
+        self.assertEqual(detect_languages("مهندس مدني ذو خبرة عشر سنوات في إدارة المشاريع والتكوين"), ["ara"])
+        self.assertEqual(
+            detect_languages("مهندس مدني ذو خبرة عشر سنوات في إدارة المشاريع - Ingénieur, gestion de projet et formation"),
+            ["fra", "ara"],
+        )
+
+    def test_whitelist_only_for_latin_profiles(self):
+        latin = OCRProfile(["eng", "fra"])
+        self.assertEqual(latin.name, "fra+eng")
+        self.assertIn(f"tessedit_char_whitelist={LATIN_WHITELIST}", latin.config())
+
+        arabe = OCRProfile(["ara", "fra"])
+        self.assertEqual(arabe.name, "fra+ara")
+        self.assertIsNone(arabe.whitelist)
+        self.assertNotIn("whitelist", arabe.config())
+        # Langue inconnue ou non installée : tous les modèles
+        self.assertEqual(OCRProfile(["deu"]).name, "fra+ara+eng")
+
+
+class RosterTestCase(TestCase):
+    """Deux consultants avec compétences, partagés par les tests de lecture"""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.first = make_consultant(1)
+        cls.second = make_consultant(2, ville="Nouakchott")
+        bulk_add_competences({cls.first.id: ["Python", "python3", "Django"], cls.second.id: ["SQL"]}, niveau=2)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ConditionalGetTests(RosterTestCase):
+    def test_etag_revalidation(self):
+        url = reverse("consultant-data", args=[self.first.id])
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+        competences_url = reverse("consultant-competences", args=[self.first.id])
+        self.assertNotEqual(self.client.get(competences_url)["ETag"], etag)
+
+        Consultant.objects.get(pk=self.first.pk).save()
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_last_modified_only_once_the_second_is_over(self):
+        url = reverse("consultant-data", args=[self.first.id])
+        Consultant.objects.get(pk=self.first.pk).save()
+        response = self.client.get(url)
+        self.assertNotIn("Last-Modified", response)
+        # Une seconde tronquée ne suffit pas à prouver que la copie est à jour
+        future = http_date(time.time() + 3600)
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=future).status_code, 200)
+
+        Consultant.objects.filter(pk=self.first.pk).update(updated_at=timezone.now() - timedelta(hours=1))
+        last_modified = self.client.get(url)["Last-Modified"]
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 304)
+
+        Consultant.objects.get(pk=self.first.pk).save()
+        self.assertEqual(self.client.get(url, HTTP_IF_MODIFIED_SINCE=last_modified).status_code, 200)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class BatchTests(RosterTestCase):
+    def test_batch(self):
+        url = reverse("consultant-batch")
+        response = self.client.get(url, {"ids": f"{self.second.id},{self.first.id},999999"})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([r["consultant_id"] for r in response.json()["results"]], [self.second.id, self.first.id])
+        self.assertEqual(response.json()["introuvables"], [999999])
+        self.assertEqual(len(response.json()["results"][1]["competences"]), 2)
+
+        response = self.client.post(url, {"ids": [self.first.id]}, content_type="application/json")
+        self.assertEqual(len(response.json()["results"]), 1)
+
+    def test_rejects_invalid_ids(self):
+        url = reverse("consultant-batch")
+        for ids in [["abc"], [], list(range(1, 102))]:
+            with self.subTest(ids=len(ids)):
+                response = self.client.post(url, {"ids": ids}, content_type="application/json")
+                self.assertEqual(response.status_code, 400)
+
+
+@override_settings(CACHES=LOCMEM_CACHES)
+class ExportTests(RosterTestCase):
+    def export(self, **params):
+        response = self.client.get(reverse("consultant-export"), params)
+        self.assertEqual(response.status_code, 200)
+        return response, b"".join(response.streaming_content)
+
+    def test_csv(self):
+        response, content = self.export()
+        self.assertEqual(response["Content-Type"], "text/csv; charset=utf-8")
+        lines = content.decode("utf-8").splitlines()
+        self.assertEqual(len(lines), 3)
+        self.assertTrue(lines[0].startswith("id,nom,prenom"))
+        self.assertTrue(lines[1].endswith("Python:2;Django:2") or lines[1].endswith("Django:2;Python:2"))
+
+    def test_ndjson_gzip(self):
+        response, content = self.export(type="ndjson", gzip="1")
+        self.assertIn("consultants.ndjson.gz", response["Content-Disposition"])
+        rows = [json.loads(line) for line in gzip.decompress(content).decode("utf-8").splitlines()]
+        self.assertEqual([row["id"] for row in rows], [self.first.id, self.second.id])
+        self.assertEqual(rows[1]["competences"], [{"nom": "SQL", "niveau": 2}])
+
+    def test_chunks_cover_every_consultant(self):
+        from .export import export_consultants
+
+        content = b"".join(export_consultants("ndjson", chunk_size=1))
+        self.assertEqual(len(content.splitlines()), 2)
+
+    def test_rejects_unknown_type(self):
+        self.assertEqual(self.client.get(reverse("consultant-export"), {"type": "xml"}).status_code, 400)
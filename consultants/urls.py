@@ -1,10 +1,29 @@
 
 from django.urls import path
-from . import views
+from . import async_views, views
 
 urlpatterns = [
     path('consultant/register/', views.consultant_register, name='consultant-register'),
     path('consultant/login/', views.consultant_login, name='consultant-login'),
+    path('consultant/search/', views.consultant_search, name='consultant-search'),
+    path('consultant/batch/', views.consultant_batch, name='consultant-batch'),
+    path('consultant/export/', views.consultant_export, name='consultant-export'),
+    path('consultant/import/', views.consultant_import, name='consultant-import'),
     path('consultant/<int:consultant_id>/data/', views.consultant_data, name='consultant-data'),
     path('consultant/<int:consultant_id>/competences/', views.consultant_competences, name='consultant-competences'),
+    path('consultant/disponibles/', views.consultants_free, name='consultants-free'),
+    path('consultant/conflits/', views.consultants_conflicts, name='consultants-conflicts'),
+    path('consultant/cv-search/', views.cv_text_search, name='cv-text-search'),
+    path('appel-offre/<int:appel_offre_id>/consultants/', views.appel_offre_consultants,
+         name='appel-offre-consultants'),
+    path('appel-offre/<int:appel_offre_id>/propositions/', views.appel_offre_propositions,
+         name='appel-offre-propositions'),
+    path('appel-offre/<int:appel_offre_id>/scores/', views.appel_offre_scores, name='appel-offre-scores'),
+    path('consultant/cv-jobs/<int:job_id>/', views.cv_job_status, name='cv-job-status'),
+    # Mêmes ressources en vues asynchrones, pour un déploiement ASGI (backend.asgi)
+    path('async/consultant/register/', async_views.consultant_register, name='async-consultant-register'),
+    path('async/consultant/<int:consultant_id>/data/', async_views.consultant_data, name='async-consultant-data'),
+    path('async/consultant/<int:consultant_id>/competences/', async_views.consultant_competences,
+         name='async-consultant-competences'),
+    path('async/consultant/cv-jobs/<int:job_id>/', async_views.cv_job_status, name='async-cv-job-status'),
 ]
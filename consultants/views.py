@@ -1,56 +1,48 @@
-import re, fitz, pytesseract
-from PIL import Image, ImageEnhance
-import spacy
+import logging
+import time
+from decimal import Decimal
+from django.http import StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django.views.decorators.csrf import csrf_exempt
-from django.core.files.storage import default_storage
 from django.db import transaction
+from django.db.models import F, Prefetch
+from django.utils.cache import get_conditional_response
+from django.utils.dateparse import parse_date
+from django.utils.http import http_date
 from rest_framework.decorators import api_view, parser_classes
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework.parsers import MultiPartParser, FormParser
-from .models import Consultant, Competence, User
+from .models import AppelOffre, Consultant, Competence, Evaluation, Mission, Proposition, Skill, User, CVJob
+from .consultant_cache import consultant_payload, consultant_version, get_consultant_data, load_consultants
+from .importer import import_consultants, read_rows
+from .jobs import enqueue_cv_job
+from .export import FORMATS as EXPORT_FORMATS, export_consultants
+from .extraction import validate_cv_upload
+from .metrics import span
+from .fulltext import search_cv_texts
+from .scoring import recompute_scores, reweight
+from .search import ConsultantCursorPagination, consultant_summary, search_consultants
+from .staffing import consultant_conflicts, free_consultants
 from .serializers import ConsultantSerializer, CompetenceSerializer
 
-# Charger le modèle NLP de spaCy
-nlp = spacy.load("en_core_web_sm")
+logger = logging.getLogger(__name__)
 
 
-def extract_competences_from_cv(file_path):
-    try:
-        doc = fitz.open(file_path)
-        text = "\n".join([page.get_text("text") for page in doc])
-
-        if not text.strip():
-            text = ""
-            for page in doc:
-                pix = page.get_pixmap(dpi=300)
-                img = Image.frombytes("RGB", [pix.width, pix.height], pix.samples)
-                img = img.convert("L")
-                img = ImageEnhance.Contrast(img).enhance(3.0)
-                img = ImageEnhance.Sharpness(img).enhance(2.0)
-                text += pytesseract.image_to_string(img, lang="eng")
-
-        doc_nlp = nlp(text)
-        competences = set()
-
-        for ent in doc_nlp.ents:
-            if ent.label_ in ["ORG", "PRODUCT", "SKILL", "WORK_OF_ART", "LANGUAGE"]:
-                cleaned = ent.text.strip().title()
-                if 2 < len(cleaned) < 40 and not re.search(r"\d", cleaned):
-                    competences.add(cleaned)
-
-        for token in doc_nlp:
-            if token.pos_ in ["PROPN", "NOUN"] and token.is_alpha and token.ent_type_ == "":
-                cleaned = token.text.strip().title()
-                if 2 < len(cleaned) < 30:
-                    competences.add(cleaned)
-
-        return list(competences)
-
-    except Exception as e:
-        print("Erreur NLP:", e)
-        return []
+def query_dates(params, *names):
+    """Dates AAAA-MM-JJ des paramètres présents : (dates, None) ou (None, réponse 400)"""
+    dates = {}
+    for name in names:
+        value = params.get(name)
+        if value:
+            try:
+                dates[name] = parse_date(value)
+            except ValueError:
+                dates[name] = None
+            if dates[name] is None:
+                return None, Response({"error": f"Date invalide pour {name} (AAAA-MM-JJ)."},
+                                      status=status.HTTP_400_BAD_REQUEST)
+    return dates, None
 
 
 @csrf_exempt
@@ -65,6 +57,14 @@ def consultant_register(request):
         if User.objects.filter(username=email).exists():
             return Response({"error": "Un utilisateur avec cet email existe déjà."}, status=400)
 
+        cv_file = request.FILES.get('cv')
+        if cv_file:
+            try:
+                with span("validation_cv", octets=cv_file.size):
+                    validate_cv_upload(cv_file)
+            except ValueError as e:
+                return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
         with transaction.atomic():
             user = User.objects.create_user(
                 username=email,
@@ -80,35 +80,23 @@ def consultant_register(request):
 
             if serializer.is_valid():
                 consultant = serializer.save()
-                competences = []
-
-                cv_file = request.FILES.get('cv')
-                if cv_file:
-                    path = default_storage.save(f"cvs/{cv_file.name}", cv_file)
-                    file_path = default_storage.path(path)
+                job = None
 
-                    competences = extract_competences_from_cv(file_path)
-
-                    for nom_comp in competences:
-                        try:
-                            Competence.objects.create(
-                                consultant=consultant,
-                                nom_competence=nom_comp,
-                                niveau=1
-                            )
-                        except Exception as e:
-                            print(f"Erreur compétence {nom_comp} :", e)
+                if consultant.cv:
+                    # Le CV n'est stocké qu'une fois (champ cv du serializer) ;
+                    # l'extraction (OCR + NLP) est faite par le worker : python manage.py cv_worker
+                    job = enqueue_cv_job(consultant, consultant.cv.name)
 
                 return Response({
                     "message": "Consultant créé avec succès.",
                     "consultant_id": consultant.id,
-                    "competences": competences
-                }, status=status.HTTP_201_CREATED)
+                    "job_id": job.id if job else None,
+                }, status=status.HTTP_202_ACCEPTED if job else status.HTTP_201_CREATED)
 
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     except Exception as e:
-        print("💥 Exception:", e)
+        logger.exception("Erreur inscription consultant")
         return Response({"error": str(e)}, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
 
 
@@ -130,38 +118,409 @@ def consultant_login(request):
         return Response({"error": "Email incorrect"}, status=404)
 
 
+# Délai (secondes) après la fin de la seconde de updated_at avant d'exposer Last-Modified
+LAST_MODIFIED_DELAY = 2
+
+
+def consultant_validators(kind, version):
+    """ETag et Last-Modified d'une représentation de la fiche (kind) à une version donnée
+
+    Last-Modified est tronqué à la seconde : une modification tombant dans la
+    même seconde ferait répondre 304 à If-Modified-Since avec une copie
+    périmée. Il vaut donc None (seul l'ETag sert) tant que cette seconde, plus
+    LAST_MODIFIED_DELAY pour les transactions en cours, n'est pas écoulée.
+    """
+    revision, updated_at = version
+    etag = f'"{kind}-{revision}-{int(updated_at.timestamp() * 1_000_000):x}"'
+    last_modified = int(updated_at.timestamp())
+    if time.time() < last_modified + 1 + LAST_MODIFIED_DELAY:
+        return etag, None
+    return etag, last_modified
+
+
+def conditional(request, kind, version, build):
+    """304 si le client a déjà cette version, sinon la réponse construite par build() ; validateurs posés"""
+    etag, last_modified = consultant_validators(kind, version)
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is None:
+        response = build()
+    return set_validators(response, etag, last_modified)
+
+
+def set_validators(response, etag, last_modified):
+    if response.status_code in (200, 304):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        # Le client garde sa copie mais revalide à chaque lecture
+        response['Cache-Control'] = 'private, no-cache'
+    return response
+
+
 @api_view(['GET'])
 def consultant_data(request, consultant_id):
-    try:
-        consultant = get_object_or_404(Consultant, id=consultant_id)
-        competences = Competence.objects.filter(consultant=consultant)
-        competences_list = [c.nom_competence for c in competences]
-
-        nb = len(competences_list)
-        expertise = "Expert" if nb >= 10 else "Intermédiaire" if nb >= 5 else "Débutant"
-
-        return Response({
-            "firstName": consultant.prenom,
-            "lastName": consultant.nom,
-            "email": consultant.user.email,
-            "phone": consultant.telephone,
-            "country": consultant.pays,
-            "city": consultant.ville,
-            "startAvailability": consultant.date_debut_dispo,
-            "endAvailability": consultant.date_fin_dispo,
-            "skills": ", ".join(competences_list),
-            "expertise": expertise,
-            "cvFilename": consultant.cv.name.split('/')[-1] if consultant.cv else None
-        })
+    version = consultant_version(consultant_id)
+    if version is None:
+        return Response({"error": "Consultant introuvable."}, status=status.HTTP_404_NOT_FOUND)
 
-    except Exception as e:
-        print("Erreur récupération consultant:", e)
-        return Response({"error": "Erreur lors de la récupération des données."}, status=500)
+    def build():
+        try:
+            data = get_consultant_data(consultant_id, version)
+        except Exception:
+            logger.exception("Erreur récupération consultant %s", consultant_id)
+            return Response({"error": "Erreur lors de la récupération des données."}, status=500)
+        if data is None:
+            return Response({"error": "Consultant introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        return Response(data)
+
+    return conditional(request, "data", version, build)
 
 
 @api_view(['GET'])
 def consultant_competences(request, consultant_id):
-    consultant = get_object_or_404(Consultant, id=consultant_id)
-    competences = Competence.objects.filter(consultant=consultant)
-    serializer = CompetenceSerializer(competences, many=True)
-    return Response(serializer.data)
+    version = consultant_version(consultant_id)
+    if version is None:
+        return Response({"error": "Consultant introuvable."}, status=status.HTTP_404_NOT_FOUND)
+
+    def build():
+        competences = Competence.objects.filter(consultant_id=consultant_id).select_related('skill')
+        return Response(CompetenceSerializer(competences, many=True).data)
+
+    return conditional(request, "competences", version, build)
+
+
+MAX_BATCH_IDS = 100
+
+
+@api_view(['GET', 'POST'])
+def consultant_batch(request):
+    """Fiches et compétences de plusieurs consultants : GET ?ids=1,2,3 ou POST {"ids": [...]}
+
+    Mêmes formats que consultant_data et consultant_competences, en deux
+    requêtes quel que soit le nombre de consultants.
+    """
+    if request.method == 'POST':
+        raw = request.data.get('ids') or []
+        raw = raw if isinstance(raw, list) else [raw]
+    else:
+        raw = [value for values in request.query_params.getlist('ids') for value in values.split(',')]
+    try:
+        ids = list(dict.fromkeys(int(value) for value in raw if str(value).strip()))
+    except (TypeError, ValueError):
+        return Response({"error": "ids doit être une liste d'entiers."}, status=status.HTTP_400_BAD_REQUEST)
+    if not ids or len(ids) > MAX_BATCH_IDS:
+        return Response({"error": f"Entre 1 et {MAX_BATCH_IDS} identifiants."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    with span("consultants_lot", consultants=len(ids)):
+        consultants = load_consultants(ids)
+        results = []
+        for consultant_id in ids:
+            consultant = consultants.get(consultant_id)
+            if consultant is None:
+                continue
+            competences = list(consultant.competences.all())
+            results.append({
+                "consultant_id": consultant_id,
+                "data": consultant_payload(consultant, [c.skill.nom for c in competences]),
+                "competences": CompetenceSerializer(competences, many=True).data,
+            })
+    return Response({
+        "results": results,
+        "introuvables": [consultant_id for consultant_id in ids if consultant_id not in consultants],
+    })
+
+
+@api_view(['GET'])
+def consultant_export(request):
+    """Export complet en flux : ?type=csv|ndjson&gzip=1 (pas de format=, réservé par DRF)"""
+    export_format = request.query_params.get('type', 'csv')
+    if export_format not in EXPORT_FORMATS:
+        return Response({"error": "type doit valoir csv ou ndjson."}, status=status.HTTP_400_BAD_REQUEST)
+    gzip = request.query_params.get('gzip') in ('1', 'true')
+
+    content_type, extension = EXPORT_FORMATS[export_format]
+    filename = f"consultants.{extension}" + (".gz" if gzip else "")
+    response = StreamingHttpResponse(
+        export_consultants(export_format, gzip),
+        content_type="application/gzip" if gzip else content_type,
+    )
+    response['Content-Disposition'] = f'attachment; filename="{filename}"'
+    return response
+
+
+@csrf_exempt
+@api_view(['POST'])
+@parser_classes([MultiPartParser, FormParser])
+def consultant_import(request):
+    """Import groupé d'un CSV ou .xlsx (champ fichier) : rapport avec lignes/s et erreurs par ligne"""
+    fichier = request.FILES.get('fichier')
+    if fichier is None:
+        return Response({"error": "Fichier requis (champ fichier, .csv ou .xlsx)."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    try:
+        rows = read_rows(fichier, fichier.name)
+        with span("import_consultants", octets=fichier.size) as attrs:
+            report = import_consultants(rows)
+            attrs.update(lignes=report["lignes"], erreurs=report["erreurs"])
+    except (ValueError, ImportError) as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    if report["interruption"]:
+        # Fichier illisible en cours de lecture : rapport partiel de ce qui a été enregistré
+        return Response({"error": report["interruption"]["erreur"], **report}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(report)
+
+
+@api_view(['GET'])
+def consultant_search(request):
+    """Recherche paginée : ?skill=Python&skill=Django&pays=&ville=&disponible_du=&disponible_au=&limit=&cursor="""
+    params = request.query_params
+    skills = [
+        skill.strip()
+        for value in params.getlist('skill')
+        for skill in value.split(',')
+        if skill.strip()
+    ]
+
+    dates, error = query_dates(params, 'disponible_du', 'disponible_au')
+    if error:
+        return error
+
+    with span("recherche_consultants", competences=len(skills)):
+        queryset = search_consultants(skills, params.get('pays'), params.get('ville'), **dates)
+        paginator = ConsultantCursorPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response([consultant_summary(c) for c in page])
+
+
+@api_view(['GET'])
+def cv_text_search(request):
+    """Recherche plein texte dans les CV : ?q=...&limit=, résultats classés avec extrait"""
+    query = request.query_params.get('q', '').strip()
+    if not query:
+        return Response({"error": "Paramètre q requis."}, status=status.HTTP_400_BAD_REQUEST)
+    try:
+        limit = min(max(int(request.query_params.get('limit', 20)), 1), 100)
+    except ValueError:
+        return Response({"error": "limit doit être un entier."}, status=status.HTTP_400_BAD_REQUEST)
+
+    with span("recherche_cv", limit=limit) as attrs:
+        hits = search_cv_texts(query, limit)
+        consultants = Consultant.objects.only('id', 'nom', 'prenom', 'pays', 'ville').in_bulk(
+            [consultant_id for consultant_id, _, _ in hits]
+        )
+        attrs["resultats"] = len(hits)
+
+    return Response({
+        "query": query,
+        "results": [
+            {
+                "consultant_id": consultant_id,
+                "firstName": consultants[consultant_id].prenom,
+                "lastName": consultants[consultant_id].nom,
+                "country": consultants[consultant_id].pays,
+                "city": consultants[consultant_id].ville,
+                "score": score,
+                "snippet": snippet,
+            }
+            for consultant_id, score, snippet in hits
+            if consultant_id in consultants
+        ],
+    })
+
+
+@api_view(['GET'])
+def appel_offre_consultants(request, appel_offre_id):
+    """Meilleurs consultants pour un appel d'offres : ?k=20&disponible_du=&disponible_au="""
+    params = request.query_params
+    try:
+        k = min(max(int(params.get('k', 20)), 1), 200)
+    except ValueError:
+        return Response({"error": "k doit être un entier."}, status=status.HTTP_400_BAD_REQUEST)
+
+    dates, error = query_dates(params, 'disponible_du', 'disponible_au')
+    if error:
+        return error
+
+    # numpy et scipy ne sont chargés qu'au premier classement
+    from .matching import MatrixNotReady, rank_consultants
+
+    try:
+        appel_offre, weights, ranking = rank_consultants(
+            appel_offre_id, k, dates.get('disponible_du'), dates.get('disponible_au')
+        )
+    except AppelOffre.DoesNotExist:
+        return Response({"error": "Appel d'offres introuvable."}, status=status.HTTP_404_NOT_FOUND)
+    except MatrixNotReady:
+        return Response(
+            {"error": "Classement indisponible : lancer python manage.py build_matching_matrix."},
+            status=status.HTTP_503_SERVICE_UNAVAILABLE,
+        )
+
+    noms = dict(Skill.objects.filter(id__in=weights.keys()).values_list('id', 'nom'))
+    consultants = Consultant.objects.only('id', 'nom', 'prenom', 'pays', 'ville').in_bulk(
+        [consultant_id for consultant_id, _, _ in ranking]
+    )
+    return Response({
+        "appel_offre_id": appel_offre.id,
+        "skills": {noms[skill_id]: poids for skill_id, poids in weights.items() if skill_id in noms},
+        "results": [
+            {
+                "consultant_id": consultant_id,
+                "firstName": consultants[consultant_id].prenom,
+                "lastName": consultants[consultant_id].nom,
+                "country": consultants[consultant_id].pays,
+                "city": consultants[consultant_id].ville,
+                "score": round(score, 4),
+                "matchedSkills": [noms[skill_id] for skill_id in matched if skill_id in noms],
+            }
+            for consultant_id, score, matched in ranking
+            if consultant_id in consultants
+        ],
+    })
+
+
+MAX_PROPOSITIONS = 200
+
+
+@api_view(['GET'])
+def appel_offre_propositions(request, appel_offre_id):
+    """Propositions classées par rang (non classées en dernier) : ?limit=50&offset=0"""
+    try:
+        limit = min(max(int(request.query_params.get('limit', 50)), 1), MAX_PROPOSITIONS)
+        offset = max(int(request.query_params.get('offset', 0)), 0)
+    except ValueError:
+        return Response({"error": "limit et offset doivent être des entiers."}, status=status.HTTP_400_BAD_REQUEST)
+    if not AppelOffre.objects.filter(id=appel_offre_id).exists():
+        return Response({"error": "Appel d'offres introuvable."}, status=status.HTTP_404_NOT_FOUND)
+
+    propositions = (
+        Proposition.objects.filter(appel_offre_id=appel_offre_id)
+        .select_related('consultant')
+        .prefetch_related(Prefetch('evaluations', queryset=Evaluation.objects.select_related('critere')))
+        .order_by(F('rang').asc(nulls_last=True), 'id')
+    )
+    return Response({
+        "appel_offre_id": appel_offre_id,
+        "total": propositions.count(),
+        "results": [
+            {
+                "proposition_id": proposition.id,
+                "consultant_id": proposition.consultant_id,
+                "firstName": proposition.consultant.prenom,
+                "lastName": proposition.consultant.nom,
+                "montant_propose_usd": proposition.montant_propose_usd,
+                "statut": proposition.statut,
+                "score": proposition.score_final,
+                "rang": proposition.rang,
+                "notes": {e.critere.nom_critere: e.note for e in proposition.evaluations.all()},
+            }
+            for proposition in propositions[offset:offset + limit]
+        ],
+    })
+
+
+@api_view(['POST'])
+def appel_offre_scores(request, appel_offre_id):
+    """Recalcule scores et rangs ; {"poids": {critere_id: poids}} modifie d'abord les poids des critères"""
+    if not AppelOffre.objects.filter(id=appel_offre_id).exists():
+        return Response({"error": "Appel d'offres introuvable."}, status=status.HTTP_404_NOT_FOUND)
+
+    poids = request.data.get('poids') or {}
+    try:
+        poids = {int(critere_id): Decimal(str(valeur)) for critere_id, valeur in poids.items()}
+    except (AttributeError, TypeError, ValueError, ArithmeticError):
+        return Response({"error": "poids doit être un objet {critere_id: nombre}."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    # NaN et infinis : la comparaison lèverait InvalidOperation
+    if any(not valeur.is_finite() or not Decimal(0) <= valeur < Decimal(1000) for valeur in poids.values()):
+        return Response({"error": "Chaque poids doit être compris entre 0 et 999.99."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    try:
+        with span("classement_propositions", criteres=len(poids)) as attrs:
+            result = reweight(appel_offre_id, poids) if poids else recompute_scores(appel_offre_id)
+            attrs.update(result)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+    return Response(result)
+
+
+MAX_CONFLICT_IDS = 500
+
+
+@api_view(['GET'])
+def consultants_free(request):
+    """Consultants libres sur une période : ?debut=&fin= ou ?mission=<id>, plus skill/pays/ville, paginé"""
+    params = request.query_params
+    dates, error = query_dates(params, 'debut', 'fin')
+    if error:
+        return error
+    if params.get('mission'):
+        if not params['mission'].isdigit():
+            return Response({"error": "mission doit être un entier."}, status=status.HTTP_400_BAD_REQUEST)
+        mission = Mission.objects.filter(id=params['mission']).only('date_debut', 'date_fin').first()
+        if mission is None:
+            return Response({"error": "Mission introuvable."}, status=status.HTTP_404_NOT_FOUND)
+        dates = {'debut': mission.date_debut, 'fin': mission.date_fin}
+    if not dates.get('debut') or not dates.get('fin') or dates['debut'] > dates['fin']:
+        return Response({"error": "Période requise : debut <= fin, ou mission."},
+                        status=status.HTTP_400_BAD_REQUEST)
+
+    skills = [
+        skill.strip()
+        for value in params.getlist('skill')
+        for skill in value.split(',')
+        if skill.strip()
+    ]
+    with span("consultants_libres", competences=len(skills)):
+        queryset = free_consultants(dates['debut'], dates['fin'], skills, params.get('pays'), params.get('ville'))
+        paginator = ConsultantCursorPagination()
+        page = paginator.paginate_queryset(queryset, request)
+        return paginator.get_paginated_response([consultant_summary(c) for c in page])
+
+
+@api_view(['GET'])
+def consultants_conflicts(request):
+    """Conflits de planning : ?ids=1,2,3&debut=&fin= (sans période : missions qui se chevauchent)"""
+    params = request.query_params
+    try:
+        ids = [int(value) for raw in params.getlist('ids') for value in raw.split(',') if value.strip()]
+    except ValueError:
+        return Response({"error": "ids doit être une liste d'entiers."}, status=status.HTTP_400_BAD_REQUEST)
+    if not ids or len(ids) > MAX_CONFLICT_IDS:
+        return Response({"error": f"Entre 1 et {MAX_CONFLICT_IDS} identifiants."},
+                        status=status.HTTP_400_BAD_REQUEST)
+    dates, error = query_dates(params, 'debut', 'fin')
+    if error:
+        return error
+    if bool(dates.get('debut')) != bool(dates.get('fin')):
+        return Response({"error": "debut et fin vont ensemble."}, status=status.HTTP_400_BAD_REQUEST)
+
+    with span("conflits_planning", consultants=len(ids)):
+        conflicts = consultant_conflicts(ids, dates.get('debut'), dates.get('fin'))
+    return Response({
+        "results": [{"consultant_id": consultant_id, **entry} for consultant_id, entry in conflicts.items()],
+        "introuvables": [consultant_id for consultant_id in dict.fromkeys(ids) if consultant_id not in conflicts],
+    })
+
+
+@api_view(['GET'])
+def cv_job_status(request, job_id):
+    job = get_object_or_404(CVJob, id=job_id)
+    return Response(cv_job_payload(job))
+
+
+def cv_job_payload(job):
+    return {
+        "job_id": job.id,
+        "consultant_id": job.consultant_id,
+        "status": job.statut,
+        "progress": job.progression,
+        "step": job.etape,
+        "competences": job.competences if job.statut == CVJob.TERMINE else [],
+        "error": job.erreur,
+        "createdAt": job.created_at,
+        "startedAt": job.started_at,
+        "finishedAt": job.finished_at,
+    }